@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# Scaling grid for the exact oracles: objects x attributes x values per attribute.
+# Each (case, engine) runs in its own process with a timeout; results go to JSON.
+# Usage: python benchmarks/bench_scaling.py [--n 25,50,100 --d 6,8 --k 2,3,5] [--timeout 60]
+#                                           [--out scaling.json] [--compare previous.json]
+
+import argparse, json, multiprocessing as mp, os, platform, subprocess, sys, time
+from typing import Any, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+from bench_dp_engines import random_kary_dataset
+from oqa_profile import peak_rss_mb
+
+ENGINES = ("dp", "dp-numpy", "pa", "boolean")
+
+def make_dataset(n: int, d: int, k: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    """Seeded dataset with unique vectors; k == 2 gives boolean attributes."""
+    objects = random_kary_dataset(n, d, k, seed)
+    if k == 2:
+        objects = {oid: {a: v == "v1" for a, v in o.items()} for oid, o in objects.items()}
+    return objects
+
+def _run(engine: str, objects: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    # Import before starting the clock: module and numpy load time is not solve time
+    if engine in ("dp", "dp-numpy"):
+        from oqa_kary_oracle_dp import KaryOracleDP
+        if engine == "dp-numpy":
+            import oqa_kary_numpy  # noqa: F401  (imported lazily by solve())
+        t0 = time.perf_counter()
+        eng = KaryOracleDP(objects, engine="numpy" if engine == "dp-numpy" else "recursive")
+    elif engine == "pa":
+        sys.path.insert(0, os.path.join(ROOT, "k-ary-300"))
+        from oqa_kary_oracle_dp_pa import KaryOraclePA
+        t0 = time.perf_counter()
+        eng = KaryOraclePA(objects)
+    else:
+        from oqa_boolean_engine import BooleanOracleDP
+        t0 = time.perf_counter()
+        eng = BooleanOracleDP(objects)
+    cost = eng.solve()
+    return {"cost": cost, "states": len(eng.memo), "seconds": time.perf_counter() - t0}
+
+def _child(engine: str, objects, conn) -> None:
+    sys.setrecursionlimit(100000)
+    try:
+        out = _run(engine, objects)
+        out["status"] = "ok"
+    except Exception as e:
+        out = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    out["peak_rss_mb"] = peak_rss_mb()
+    conn.send(out)
+    conn.close()
+
+def run_case(engine: str, objects, timeout: float) -> Dict[str, Any]:
+    """One engine on one dataset in a fresh process; status ok / timeout / error / crashed."""
+    parent, child = mp.Pipe(duplex=False)
+    p = mp.Process(target=_child, args=(engine, objects, child))
+    t0 = time.perf_counter()
+    p.start()
+    child.close()
+    if parent.poll(timeout):
+        try:
+            out = parent.recv()
+        except EOFError:
+            # The child died without reporting (OOM killer, signal): record its exit code
+            p.join()
+            out = {"status": "crashed", "exitcode": p.exitcode,
+                   "error": f"crashed (exit code {p.exitcode})", "seconds": time.perf_counter() - t0}
+    else:
+        p.kill()
+        out = {"status": "timeout", "seconds": time.perf_counter() - t0}
+    p.join()
+    return out
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(rows: List[Dict[str, Any]], previous: str, threshold: float, min_seconds: float = 0.05) -> int:
+    """
+    Print per-case time ratios against an earlier results file; count regressions.
+    Cases where both runs took under min_seconds are printed but never counted:
+    at that scale the ratio is scheduler noise.
+    """
+    with open(previous, "r") as f:
+        old = {(r["n"], r["d"], r["k"], r["seed"], r["engine"]): r for r in json.load(f)["results"]}
+    slower = 0
+    for r in rows:
+        o = old.get((r["n"], r["d"], r["k"], r["seed"], r["engine"]))
+        if o is None or r["status"] != "ok" or o["status"] != "ok":
+            continue
+        ratio = r["seconds"] / o["seconds"] if o["seconds"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            if max(r["seconds"], o["seconds"]) < min_seconds:
+                flag = "  (slower, below --min_seconds)"
+            else:
+                flag = "  <-- slower"
+                slower += 1
+        print(f"{r['engine']:>9} n={r['n']} d={r['d']} k={r['k']}: "
+              f"{o['seconds']:.3f}s -> {r['seconds']:.3f}s (x{ratio:.2f}){flag}")
+    return slower
+
+def main():
+    ap = argparse.ArgumentParser(description="Scaling benchmark for the exact oracle engines")
+    ap.add_argument("--n", default="25,50,100,200,500,1000", help="Object counts (comma separated)")
+    ap.add_argument("--d", default="6,8,12", help="Attribute counts")
+    ap.add_argument("--k", default="2,3,5", help="Values per attribute (2 = boolean)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--engines", default=",".join(ENGINES), help=f"Subset of {ENGINES}")
+    ap.add_argument("--timeout", type=float, default=60.0, help="Seconds per run")
+    ap.add_argument("--out", default="bench_scaling.json", help="Results JSON path")
+    ap.add_argument("--compare", default=None, help="Earlier results JSON to compare times against")
+    ap.add_argument("--threshold", type=float, default=1.25,
+                    help="Time ratio reported as a regression by --compare")
+    ap.add_argument("--min_seconds", type=float, default=0.05,
+                    help="Runs faster than this in both files are not counted as regressions")
+    args = ap.parse_args()
+
+    ns = [int(x) for x in args.n.split(",")]
+    ds = [int(x) for x in args.d.split(",")]
+    ks = [int(x) for x in args.k.split(",")]
+    engines = [e for e in args.engines.split(",") if e]
+    for e in engines:
+        if e not in ENGINES:
+            sys.exit(f"unknown engine {e!r}; choose from {ENGINES}")
+
+    rows = []
+    for d in ds:
+        for k in ks:
+            gave_up = set()  # engines that timed out or crashed at a smaller n for this (d, k)
+            for n in sorted(ns):
+                if n > k ** d:
+                    continue
+                objects = make_dataset(n, d, k, args.seed)
+                for e in engines:
+                    if e == "boolean" and k != 2:
+                        continue
+                    row = {"n": n, "d": d, "k": k, "seed": args.seed, "engine": e}
+                    if e in gave_up:
+                        row["status"] = "skipped"
+                    else:
+                        row.update(run_case(e, objects, args.timeout))
+                        if row["status"] in ("timeout", "crashed"):
+                            gave_up.add(e)
+                    rows.append(row)
+                    detail = (f"cost={row['cost']:.6f} states={row['states']} {row['seconds']:.3f}s "
+                              f"rss={row.get('peak_rss_mb', 0):.0f}MB" if row["status"] == "ok"
+                              else row.get("error", row["status"]))
+                    print(f"{e:>9} n={n:<5} d={d:<3} k={k}: {detail}", flush=True)
+
+    meta = {"commit": _git_commit(), "python": platform.python_version(),
+            "machine": platform.machine(), "cpus": os.cpu_count(),
+            "timeout": args.timeout, "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    with open(args.out, "w") as f:
+        json.dump({"meta": meta, "results": rows}, f, indent=2)
+    print(f"Wrote {args.out} ({len(rows)} runs)")
+    if args.compare:
+        slower = compare(rows, args.compare, args.threshold, args.min_seconds)
+        if slower:
+            sys.exit(f"{slower} runs slower than x{args.threshold}")
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,12 @@
 # Exact k-ary oracle via dynamic programming + per-turn curves.
 # Dataset format: JSON mapping id -> {attr: value, ...}
 
-import argparse, json, math
-from functools import lru_cache
-from typing import Dict, List, Any, Tuple
+import argparse, hashlib, json, math, os, sys
+from typing import Dict, List, Any, Optional, Tuple
+
+# StateMemo is shared with the main oracle: import it from oqa_memo.py at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from oqa_memo import StateMemo
 
 # ---------------- Utilities ----------------
 
@@ -27,7 +30,7 @@ class KaryOracleDP:
     Oracle for multi-valued (k-ary) attributes.
     Assumptions: uniform prior over objects, noiseless answers.
     """
-    def __init__(self, objects: Dict[str, Dict[str, str]]):
+    def __init__(self, objects: Dict[str, Dict[str, str]], memo: Optional[StateMemo] = None):
         self.ids = sorted(objects.keys())
         self.n = len(self.ids)
         self.attrs = sorted({a for o in objects.values() for a in o.keys()})
@@ -47,7 +50,18 @@ class KaryOracleDP:
                 self.mask_by_attr_val[a][v] = m
 
         self.root = (1 << self.n) - 1
-        self._best_attr: Dict[int, str] = {}
+        self.fingerprint = self._fingerprint()
+        self.memo = memo if memo is not None else StateMemo()
+        self.memo.bind(self.fingerprint)
+
+    def _fingerprint(self) -> str:
+        """Hash of the dataset encoding; equal fingerprints mean masks are interchangeable."""
+        h = hashlib.sha256()
+        h.update(json.dumps([self.ids, self.attrs]).encode())
+        for a in self.attrs:
+            for v, m in self.mask_by_attr_val[a].items():
+                h.update(f"{a}={v}:{m:x};".encode())
+        return h.hexdigest()
 
     # Split S into non-empty proper children for attribute a
     def _children(self, S: int, a: str) -> List[int]:
@@ -67,13 +81,20 @@ class KaryOracleDP:
                 return False
         return True
 
-    @lru_cache(maxsize=None)
     def optimal_cost(self, S: int) -> float:
         """Minimal expected queries from candidate mask S."""
-        size = bitcount(S)
-        if size <= 1:
+        if bitcount(S) <= 1:
             return 0.0
+        hit = self.memo.get(S)
+        if hit is not None:
+            return hit[0]
+        best, best_a = self._evaluate(S)
+        self.memo.put(S, best, best_a)
+        return best
 
+    def _evaluate(self, S: int) -> Tuple[float, str]:
+        """Score every splitting attribute at S; returns (cost, best_attr)."""
+        size = bitcount(S)
         best = float("inf")
         best_a = None
         for a in self.attrs:
@@ -89,11 +110,20 @@ class KaryOracleDP:
 
         if best_a is None:
             # Irreducible equivalence class
-            self._best_attr[S] = ""
-            return 0.0
+            return 0.0, ""
 
-        self._best_attr[S] = best_a
-        return best
+        return best, best_a
+
+    def best_attr(self, S: int) -> str:
+        """Optimal question at S ("" for leaves); re-solves S if it was evicted."""
+        if bitcount(S) <= 1:
+            return ""
+        entry = self.memo.get(S)
+        if entry is None:
+            cost, a = self._evaluate(S)
+            self.memo.put(S, cost, a)
+            return a
+        return entry[1]
 
     def build_optimal_tree(self, S: int = None) -> Dict[str, Any]:
         """Reconstruct one optimal tree."""
@@ -102,7 +132,7 @@ class KaryOracleDP:
         size = bitcount(S)
         if size <= 1:
             return {"type": "leaf", "size": size, "ids": ids_from_mask(S, self.idx2id)}
-        a = self._best_attr.get(S, "")
+        a = self.best_attr(S)
         if not a:
             return {"type": "leaf", "size": size, "ids": ids_from_mask(S, self.idx2id)}
         children = []
@@ -161,7 +191,7 @@ class KaryOracleDP:
                     # Absorbing
                     next_dist[S] = next_dist.get(S, 0.0) + pS
                     continue
-                a = self._best_attr.get(S, "")
+                a = self.best_attr(S)
                 if not a:
                     # Treat as absorbing if no split cached (safety)
                     next_dist[S] = next_dist.get(S, 0.0) + pS
@@ -187,15 +217,19 @@ def main():
     ap.add_argument("--dataset", required=True, help="JSON: {id: {attr: value}}")
     ap.add_argument("--save_tree", default=None, help="Optional JSON path for the optimal tree")
     ap.add_argument("--curve_csv", default=None, help="Optional CSV path for per-turn expectations")
+    ap.add_argument("--memo_max_entries", type=int, default=None,
+                    help="Cap on memoized states; eviction drops the smallest states among the least recently used half")
     args = ap.parse_args()
 
     with open(args.dataset, "r") as f:
         objects = json.load(f)
 
-    oracle = KaryOracleDP(objects)
+    oracle = KaryOracleDP(objects, memo=StateMemo(max_entries=args.memo_max_entries))
     opt = oracle.optimal_cost(oracle.root)
     print(f"Objects: {oracle.n}, Attributes: {len(oracle.attrs)}")
     print(f"Optimal expected number of queries (uniform prior): {opt:.6f}")
+    st = oracle.memo.stats()
+    print(f"Memo: {st['size']} states, {st['hits']} hits, {st['misses']} misses, {st['evictions']} evicted")
 
     if args.save_tree:
         tree = oracle.build_optimal_tree()
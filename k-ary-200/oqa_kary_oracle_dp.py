@@ -2,15 +2,18 @@
 #!/usr/bin/env python3
 # Exact k-ary oracle via DP + per-turn expected candidates/entropy curves.
 
-import argparse, json, math
-from functools import lru_cache
-from typing import Dict, List, Any
+import argparse, hashlib, json, math, os, sys
+from typing import Dict, List, Any, Optional, Tuple
+
+# StateMemo is shared with the main oracle: import it from oqa_memo.py at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from oqa_memo import StateMemo
 
 def bitcount(x: int) -> int:
     return x.bit_count()
 
 class KaryOracleDP:
-    def __init__(self, objects: Dict[str, Dict[str, str]]):
+    def __init__(self, objects: Dict[str, Dict[str, str]], memo: Optional[StateMemo] = None):
         self.ids = sorted(objects.keys())
         self.n = len(self.ids)
         self.attrs = sorted({a for o in objects.values() for a in o})
@@ -26,7 +29,18 @@ class KaryOracleDP:
                         m |= 1 << self.id2idx[oid]
                 self.M[a][v] = m
         self.root = (1 << self.n) - 1
-        self._best_attr: Dict[int, str] = {}
+        self.fingerprint = self._fingerprint()
+        self.memo = memo if memo is not None else StateMemo()
+        self.memo.bind(self.fingerprint)
+
+    def _fingerprint(self) -> str:
+        """Hash of the dataset encoding; equal fingerprints mean masks are interchangeable."""
+        h = hashlib.sha256()
+        h.update(json.dumps([self.ids, self.attrs]).encode())
+        for a in self.attrs:
+            for v, m in self.M[a].items():
+                h.update(f"{a}={v}:{m:x};".encode())
+        return h.hexdigest()
 
     def _children(self, S: int, a: str) -> List[int]:
         kids = []
@@ -44,11 +58,20 @@ class KaryOracleDP:
                 return False
         return True
 
-    @lru_cache(maxsize=None)
     def optimal_cost(self, S: int) -> float:
         n = bitcount(S)
         if n <= 1:
             return 0.0
+        hit = self.memo.get(S)
+        if hit is not None:
+            return hit[0]
+        best, best_a = self._evaluate(S)
+        self.memo.put(S, best, best_a)
+        return best
+
+    def _evaluate(self, S: int) -> Tuple[float, str]:
+        """Score every splitting attribute at S; returns (cost, best_attr)."""
+        n = bitcount(S)
         best, best_a = float("inf"), None
         for a in self.attrs:
             parts = self._children(S, a)
@@ -61,10 +84,19 @@ class KaryOracleDP:
             if cand < best:
                 best, best_a = cand, a
         if best_a is None:
-            self._best_attr[S] = ""
-            return 0.0
-        self._best_attr[S] = best_a
-        return best
+            return 0.0, ""
+        return best, best_a
+
+    def best_attr(self, S: int) -> str:
+        """Optimal question at S ("" for leaves); re-solves S if it was evicted."""
+        if bitcount(S) <= 1:
+            return ""
+        entry = self.memo.get(S)
+        if entry is None:
+            cost, a = self._evaluate(S)
+            self.memo.put(S, cost, a)
+            return a
+        return entry[1]
 
     def expected_curve(self):
         """Return dict with lists: turn, E_candidates, E_entropy_bits, leaf_mass."""
@@ -90,7 +122,7 @@ class KaryOracleDP:
                 if self._is_leaf(S):
                     next_dist[S] = next_dist.get(S, 0.0) + pS
                     continue
-                a = self._best_attr.get(S, "")
+                a = self.best_attr(S)
                 if not a:
                     next_dist[S] = next_dist.get(S, 0.0) + pS
                     continue
@@ -106,15 +138,19 @@ def main():
     ap = argparse.ArgumentParser(description="k-ary oracle with per-turn curves")
     ap.add_argument("--dataset", required=True, help="JSON mapping id -> {attr: value}")
     ap.add_argument("--curve_csv", default=None, help="CSV path to save per-turn expectations")
+    ap.add_argument("--memo_max_entries", type=int, default=None,
+                    help="Cap on memoized states; eviction drops the smallest states among the least recently used half")
     args = ap.parse_args()
 
     with open(args.dataset, "r") as f:
         objects = json.load(f)
 
-    eng = KaryOracleDP(objects)
+    eng = KaryOracleDP(objects, memo=StateMemo(max_entries=args.memo_max_entries))
     opt = eng.optimal_cost(eng.root)
     print(f"Objects: {eng.n}, Attributes: {len(eng.attrs)}")
     print(f"Optimal expected number of queries (uniform prior): {opt:.6f}")
+    st = eng.memo.stats()
+    print(f"Memo: {st['size']} states, {st['hits']} hits, {st['misses']} misses, {st['evictions']} evicted")
 
     curve = eng.expected_curve()
     if args.curve_csv:
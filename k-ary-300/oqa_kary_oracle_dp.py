@@ -1,14 +1,17 @@
 
 #!/usr/bin/env python3
 # Exact k-ary oracle via DP over reachable subsets + optional per-turn curves.
-import argparse, json, math
-from functools import lru_cache
-from typing import Dict, List, Any
+import argparse, hashlib, json, math, os, sys
+from typing import Dict, List, Any, Optional, Tuple
+
+# StateMemo is shared with the main oracle: import it from oqa_memo.py at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from oqa_memo import StateMemo
 
 def bitcount(x: int) -> int: return x.bit_count()
 
 class KaryOracleDP:
-    def __init__(self, objects: Dict[str, Dict[str, str]]):
+    def __init__(self, objects: Dict[str, Dict[str, str]], memo: Optional[StateMemo] = None):
         self.ids = sorted(objects.keys())
         self.n = len(self.ids)
         self.attrs = sorted({a for o in objects.values() for a in o})
@@ -23,7 +26,18 @@ class KaryOracleDP:
                         m |= 1 << self.id2idx[oid]
                 self.M[a][v] = m
         self.root = (1 << self.n) - 1
-        self._best_attr: Dict[int, str] = {}
+        self.fingerprint = self._fingerprint()
+        self.memo = memo if memo is not None else StateMemo()
+        self.memo.bind(self.fingerprint)
+
+    def _fingerprint(self) -> str:
+        """Hash of the dataset encoding; equal fingerprints mean masks are interchangeable."""
+        h = hashlib.sha256()
+        h.update(json.dumps([self.ids, self.attrs]).encode())
+        for a in self.attrs:
+            for v, m in self.M[a].items():
+                h.update(f"{a}={v}:{m:x};".encode())
+        return h.hexdigest()
 
     def _children(self, S: int, a: str) -> List[int]:
         kids = []
@@ -39,10 +53,16 @@ class KaryOracleDP:
             if len(self._children(S, a)) > 1: return False
         return True
 
-    @lru_cache(maxsize=None)
     def optimal_cost(self, S: int) -> float:
+        if bitcount(S) <= 1: return 0.0
+        hit = self.memo.get(S)
+        if hit is not None: return hit[0]
+        best, best_a = self._evaluate(S)
+        self.memo.put(S, best, best_a)
+        return best
+
+    def _evaluate(self, S: int) -> Tuple[float, str]:
         n = bitcount(S)
-        if n <= 1: return 0.0
         best, best_a = float("inf"), None
         for a in self.attrs:
             parts = self._children(S, a)
@@ -51,11 +71,18 @@ class KaryOracleDP:
             cand = 1.0 + exp_res
             if cand < best:
                 best, best_a = cand, a
-        if best_a is None:
-            self._best_attr[S] = ""
-            return 0.0
-        self._best_attr[S] = best_a
-        return best
+        if best_a is None: return 0.0, ""
+        return best, best_a
+
+    def best_attr(self, S: int) -> str:
+        # Optimal question at S; re-solves S if it was evicted from the memo
+        if bitcount(S) <= 1: return ""
+        entry = self.memo.get(S)
+        if entry is None:
+            cost, a = self._evaluate(S)
+            self.memo.put(S, cost, a)
+            return a
+        return entry[1]
 
     def expected_curve(self):
         # Optional: per-turn E[|S_t|], E[H_t] under optimal policy (uniform prior).
@@ -77,7 +104,7 @@ class KaryOracleDP:
                 n = bitcount(S)
                 if self._is_leaf(S):
                     nxt[S] = nxt.get(S, 0.0) + pS; continue
-                a = self._best_attr.get(S, "")
+                a = self.best_attr(S)
                 if not a:
                     nxt[S] = nxt.get(S, 0.0) + pS; continue
                 parts = self._children(S, a)
@@ -91,12 +118,16 @@ def main():
     ap = argparse.ArgumentParser(description="Exact k-ary oracle (subset-mask DP)")
     ap.add_argument("--dataset", required=True, help="JSON mapping id -> {attr: value}")
     ap.add_argument("--curve_csv", default=None, help="Optional CSV path for per-turn expectations")
+    ap.add_argument("--memo_max_entries", type=int, default=None,
+                    help="Cap on memoized states; eviction drops the smallest states among the least recently used half")
     args = ap.parse_args()
     with open(args.dataset, "r") as f: objects = json.load(f)
-    eng = KaryOracleDP(objects)
+    eng = KaryOracleDP(objects, memo=StateMemo(max_entries=args.memo_max_entries))
     opt = eng.optimal_cost(eng.root)
     print(f"Objects: {eng.n}, Attributes: {len(eng.attrs)}")
     print(f"Optimal expected number of queries (uniform prior): {opt:.6f}")
+    st = eng.memo.stats()
+    print(f"Memo: {st['size']} states, {st['hits']} hits, {st['misses']} misses, {st['evictions']} evicted")
     if args.curve_csv:
         import csv
         curve = eng.expected_curve()
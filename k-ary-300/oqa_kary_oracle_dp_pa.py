@@ -1,16 +1,27 @@
-
 #!/usr/bin/env python3
 # Exact k-ary oracle via DP keyed by partial assignments (often scales better for large N).
 import argparse, json, math
-from functools import lru_cache
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 
 def bitcount(x: int) -> int: return x.bit_count()
 
+def ids_from_mask(mask: int, index2id: List[str]) -> List[str]:
+    out, i = [], 0
+    while mask:
+        if mask & 1: out.append(index2id[i])
+        mask >>= 1; i += 1
+    return out
+
 class KaryOraclePA:
     """
     State is a tuple of length d with entries in {-1, 0..K_a-1}, where -1 means "unknown".
-    Candidate set size is computed by intersecting precomputed bitmasks for assigned (a,v).
+    The search walks assignments, deriving each child's candidate mask from its parent's
+    (one AND per answer), and skips assigned attributes without touching their masks.
+    Results are memoized by candidate mask -> (cost, attribute index), so assignments
+    reaching the same candidates (color=red,shape=circle vs shape=circle,color=red)
+    share one entry: the attributes fixed along the way are constant on those
+    candidates and cannot split them, so the optimum depends on the mask alone.
+    Tie-breaking is KaryOracleDP's (see its docstring), so both give the same tree.
     """
     def __init__(self, objects: Dict[str, Dict[str, str]]):
         self.ids = sorted(objects.keys())
@@ -20,97 +31,158 @@ class KaryOraclePA:
         self.vals = {a: sorted({objects[i][a] for i in self.ids}) for a in self.attrs}
         self.val_index = {a: {v:i for i,v in enumerate(self.vals[a])} for a in self.attrs}
         self.id2idx = {oid: k for k, oid in enumerate(self.ids)}
-        # Bitmasks for (a, value_index)
+        # Bitmasks for (a, value_index), one pass over the objects
         self.M = {a: [0]*len(self.vals[a]) for a in self.attrs}
-        for a in self.attrs:
-            for v_idx, v in enumerate(self.vals[a]):
-                m = 0
-                for oid in self.ids:
-                    if objects[oid][a] == v:
-                        m |= 1 << self.id2idx[oid]
-                self.M[a][v_idx] = m
+        for k, oid in enumerate(self.ids):
+            for a in self.attrs:
+                self.M[a][self.val_index[a][objects[oid][a]]] |= 1 << k
+        self.root = (1 << self.n) - 1
         # Root state: all -1
         self.root_state = tuple([-1]*len(self.attrs))
+        self.memo: Dict[int, Tuple[float, int]] = {}
+        self.hits = 0
+        self.assignments = 0  # assignment states expanded (memo misses)
 
-    @lru_cache(maxsize=None)
     def mask_of(self, state: Tuple[int, ...]) -> int:
-        """Compute candidate bitmask for a partial assignment state."""
-        # Start with all candidates then intersect
-        mask = (1 << self.n) - 1
+        """Candidate bitmask for a partial assignment state."""
+        mask = self.root
         for a_idx, v_idx in enumerate(state):
             if v_idx >= 0:
-                a = self.attrs[a_idx]
-                mask &= self.M[a][v_idx]
-                if mask == 0:
-                    return 0
+                mask &= self.M[self.attrs[a_idx]][v_idx]
+                if mask == 0: return 0
         return mask
 
-    def _children_states(self, state: Tuple[int, ...]) -> List[Tuple[int, ...]]:
-        """Return child states by assigning one new attribute value that yields a proper split."""
-        S = self.mask_of(state)
-        n = bitcount(S)
+    def _children_states(self, state: Tuple[int, ...], S: Optional[int] = None) -> List[Tuple[Tuple[int, ...], int]]:
+        """(child state, child mask) for every answer to every unassigned attribute that splits S."""
+        if S is None: S = self.mask_of(state)
         kids = []
-        if n <= 1: return kids
-        # Try assigning any unassigned attribute
+        if bitcount(S) <= 1: return kids
         for a_idx, v_idx in enumerate(state):
-            if v_idx >= 0: 
+            if v_idx >= 0:
                 continue
-            a = self.attrs[a_idx]
-            # Consider only values that appear among current candidates
-            for val_i, mv in enumerate(self.M[a]):
+            for val_i, mv in enumerate(self.M[self.attrs[a_idx]]):
                 child_mask = S & mv
                 if child_mask and child_mask != S:
-                    # New child state
                     child_state = list(state)
                     child_state[a_idx] = val_i
-                    kids.append(tuple(child_state))
-            # If at least one split exists on this attribute, others are not needed for branching at this step
-            # (we still evaluate all attributes in the DP loop).
+                    kids.append((tuple(child_state), child_mask))
         return kids
 
-    @lru_cache(maxsize=None)
-    def optimal_cost(self, state: Tuple[int, ...]) -> float:
-        S = self.mask_of(state)
+    def _solve(self, state: Tuple[int, ...], S: int) -> float:
         n = bitcount(S)
-        if n <= 1: 
+        if n <= 1:
             return 0.0
-
-        best = float("inf")
+        hit = self.memo.get(S)
+        if hit is not None:
+            self.hits += 1
+            return hit[0]
+        self.assignments += 1
+        best, best_i = float("inf"), -1
         # Evaluate each unassigned attribute as the next question
         for a_idx, v_idx in enumerate(state):
-            if v_idx >= 0: 
+            if v_idx >= 0:
                 continue
-            a = self.attrs[a_idx]
-            # Build partitions only for values that appear and split
             parts = []
-            for val_i, mv in enumerate(self.M[a]):
+            for val_i, mv in enumerate(self.M[self.attrs[a_idx]]):
                 child_mask = S & mv
-                if child_mask and child_mask != S:
-                    child_state = list(state)
-                    child_state[a_idx] = val_i
-                    parts.append( (child_mask, tuple(child_state)) )
+                if child_mask:
+                    parts.append((val_i, child_mask))
             if len(parts) <= 1:
                 continue
             exp_res = 0.0
-            for child_mask, child_state in parts:
-                w = bitcount(child_mask) / n
-                exp_res += w * self.optimal_cost(child_state)
+            for val_i, child_mask in parts:
+                child_state = state[:a_idx] + (val_i,) + state[a_idx + 1:]
+                exp_res += (bitcount(child_mask) / n) * self._solve(child_state, child_mask)
             cand = 1.0 + exp_res
             if cand < best:
-                best = cand
-        if best == float("inf"):
-            return 0.0  # irreducible class
+                best, best_i = cand, a_idx
+        if best_i < 0:
+            best = 0.0  # irreducible class
+        self.memo[S] = (best, best_i)
         return best
 
+    def optimal_cost(self, state: Tuple[int, ...]) -> float:
+        return self._solve(state, self.mask_of(state))
+
+    def solve(self) -> float:
+        return self._solve(self.root_state, self.root)
+
+    def best_attr(self, S: int) -> str:
+        """Optimal question at a solved candidate mask ("" for leaves)."""
+        if bitcount(S) <= 1: return ""
+        entry = self.memo.get(S)
+        if entry is None:
+            # Not reached from the root: solve it with nothing assigned yet
+            self._solve(self.root_state, S)
+            entry = self.memo[S]
+        return self.attrs[entry[1]] if entry[1] >= 0 else ""
+
+    def _split(self, S: int) -> Tuple[str, List[Tuple[Any, int]]]:
+        a = self.best_attr(S)
+        if not a: return "", []
+        return a, [(v, S & mv) for v, mv in zip(self.vals[a], self.M[a]) if S & mv]
+
+    def build_optimal_tree(self, S: Optional[int] = None) -> Dict[str, Any]:
+        """One optimal tree, in the same format as KaryOracleDP.build_optimal_tree."""
+        if S is None:
+            S = self.root
+            self.solve()
+        a, pairs = self._split(S)
+        if not a:
+            return {"type": "leaf", "size": bitcount(S), "ids": ids_from_mask(S, self.ids)}
+        children = [{"value": v, "subset_size": bitcount(child), "subtree": self.build_optimal_tree(child)}
+                    for v, child in pairs]
+        return {"type": "node", "attribute": a, "size": bitcount(S), "children": children}
+
+    def expected_curve(self):
+        # Per-turn E[|S_t|], E[H_t] and mass of finished dialogs under the optimal policy (uniform prior)
+        def H(S):
+            n = bitcount(S)
+            return 0.0 if n <= 1 else math.log2(n)
+        self.solve()
+        dist = {self.root: 1.0}
+        turns, E_n, E_H, leaf_mass = [], [], [], []
+        t = 0
+        while True:
+            turns.append(t)
+            E_n.append(sum(p*bitcount(S) for S, p in dist.items()))
+            E_H.append(sum(p*H(S) for S, p in dist.items()))
+            leaf_mass.append(sum(p for S, p in dist.items() if not self.best_attr(S)))
+            if leaf_mass[-1] >= 1.0 - 1e-12: break
+            nxt = {}
+            for S, pS in dist.items():
+                a, pairs = self._split(S)
+                if not a:
+                    nxt[S] = nxt.get(S, 0.0) + pS; continue
+                n = bitcount(S)
+                for _, child in pairs:
+                    nxt[child] = nxt.get(child, 0.0) + pS * (bitcount(child)/n)
+            dist = nxt; t += 1
+        return {"turn": turns, "E_candidates": E_n, "E_entropy_bits": E_H, "leaf_mass": leaf_mass}
+
 def main():
     ap = argparse.ArgumentParser(description="Exact k-ary oracle (partial-assignment DP)")
     ap.add_argument("--dataset", required=True, help="JSON mapping id -> {attr: value}")
+    ap.add_argument("--save_tree", default=None, help="Optional JSON path for the optimal tree")
+    ap.add_argument("--curve_csv", default=None, help="Optional CSV path for per-turn expectations")
     args = ap.parse_args()
     with open(args.dataset,"r") as f: objects = json.load(f)
     eng = KaryOraclePA(objects)
-    opt = eng.optimal_cost(eng.root_state)
+    opt = eng.solve()
     print(f"Objects: {eng.n}, Attributes: {len(eng.attrs)}")
     print(f"Optimal expected number of queries (uniform prior): {opt:.6f}")
+    print(f"Memo: {len(eng.memo)} candidate sets, {eng.hits} hits from other assignments")
+    if args.save_tree:
+        with open(args.save_tree, "w") as f:
+            json.dump(eng.build_optimal_tree(), f, indent=2)
+        print(f"Saved optimal tree to: {args.save_tree}")
+    if args.curve_csv:
+        import csv
+        curve = eng.expected_curve()
+        with open(args.curve_csv, "w", newline="") as f:
+            w = csv.writer(f); w.writerow(["turn","E_candidates","E_entropy_bits","leaf_mass"])
+            for t,n,h,m in zip(curve["turn"],curve["E_candidates"],curve["E_entropy_bits"],curve["leaf_mass"]):
+                w.writerow([t,f"{n:.6f}",f"{h:.6f}",f"{m:.6f}"])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# oqa-batch: solve every dataset in the tree across a process pool and write one results table.
+# Usage: python oqa_batch.py [--out oqa_batch_results.csv|.json] [--workers N] [--engine numpy]
+
+import argparse, csv, glob, hashlib, json, os, re, sys, time, zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+from oqa_kary_oracle_dp import ENGINES, KaryOracleDP
+from oqa_kary_greedy import greedy_tree
+from oqa_profile import peak_rss_mb
+
+FIELDS = ["dataset", "objects", "attributes", "optimal_cost", "greedy_cost",
+          "states", "solve_seconds", "wall_seconds", "peak_rss_mb", "error"]
+
+def discover(root: str) -> List[Dict[str, Any]]:
+    """
+    Dataset specs under root: the boolean 25_*/100_*.json sets, every
+    oqa_kary*_dataset.json and the dataset inside each oqa_kary*_bundle.zip.
+    Byte-identical copies (e.g. oqa_kary200 at the top level and in k-ary-200/)
+    are solved once, under the shortest path.
+    """
+    specs, seen = [], {}
+    def add(name: str, path: str, member: str, data: bytes):
+        digest = hashlib.sha256(data).hexdigest()
+        prev = seen.get(digest)
+        if prev is not None and len(prev["dataset"]) <= len(name):
+            return
+        spec = {"dataset": name, "path": path, "member": member, "size": len(data)}
+        if prev is not None:
+            specs.remove(prev)
+        seen[digest] = spec
+        specs.append(spec)
+
+    for path in sorted(glob.glob(os.path.join(root, "*.json"))):
+        if re.fullmatch(r"\d+_\w+\.json", os.path.basename(path)):
+            with open(path, "rb") as f:
+                add(os.path.relpath(path, root), path, "", f.read())
+    for path in sorted(glob.glob(os.path.join(root, "**", "oqa_kary*_dataset.json"), recursive=True)):
+        with open(path, "rb") as f:
+            add(os.path.relpath(path, root), path, "", f.read())
+    for path in sorted(glob.glob(os.path.join(root, "**", "oqa_kary*_bundle.zip"), recursive=True)):
+        with zipfile.ZipFile(path) as z:
+            for member in z.namelist():
+                if member.endswith("_dataset.json"):
+                    add(f"{os.path.relpath(path, root)}/{member}", path, member, z.read(member))
+    return specs
+
+def _load(spec: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    if spec["member"]:
+        with zipfile.ZipFile(spec["path"]) as z:
+            return json.loads(z.read(spec["member"]))
+    with open(spec["path"], "r") as f:
+        return json.load(f)
+
+def run_one(spec: Dict[str, Any], engine: str) -> Dict[str, Any]:
+    """Optimal and greedy cost of one dataset; runs in its own worker process."""
+    row: Dict[str, Any] = {k: "" for k in FIELDS}
+    row["dataset"] = spec["dataset"]
+    t0 = time.perf_counter()
+    try:
+        objects = _load(spec)
+        # Loading (zip/JSON parse) counts toward wall_seconds only
+        t1 = time.perf_counter()
+        oracle = KaryOracleDP(objects, engine=engine)
+        row["objects"], row["attributes"] = oracle.n, len(oracle.attrs)
+        row["optimal_cost"] = oracle.solve()
+        row["states"] = len(oracle.memo)
+        row["solve_seconds"] = time.perf_counter() - t1
+        row["greedy_cost"] = greedy_tree(oracle)[1]
+    except Exception as e:  # keep the rest of the batch going
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["wall_seconds"] = time.perf_counter() - t0
+    # Each dataset gets a fresh worker process, so the peak is this dataset's
+    row["peak_rss_mb"] = peak_rss_mb()
+    return row
+
+def write_results(rows: List[Dict[str, Any]], out: str) -> None:
+    if out.endswith(".json"):
+        with open(out, "w") as f:
+            json.dump(rows, f, indent=2)
+        return
+    with open(out, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS)
+        w.writeheader()
+        for r in rows:
+            w.writerow({k: (f"{v:.6f}" if isinstance(v, float) else v) for k, v in r.items()})
+
+def main():
+    ap = argparse.ArgumentParser(description="Solve every shipped dataset and write one results table")
+    ap.add_argument("--root", default=os.path.dirname(os.path.abspath(__file__)),
+                    help="Directory to search for datasets (default: this repo)")
+    ap.add_argument("--out", default="oqa_batch_results.csv", help="Results path (.csv or .json)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="Worker processes (default: all cores)")
+    ap.add_argument("--engine", default="recursive", choices=ENGINES, help="DP engine")
+    ap.add_argument("--only", default=None, help="Regex; only datasets whose path matches")
+    args = ap.parse_args()
+
+    specs = discover(args.root)
+    if args.only:
+        specs = [s for s in specs if re.search(args.only, s["dataset"])]
+    # Largest first so the long solves start while small ones fill the gaps
+    specs.sort(key=lambda s: -s["size"])
+    print(f"Datasets: {len(specs)}, workers: {args.workers}", file=sys.stderr)
+
+    rows = []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), max_tasks_per_child=1) as ex:
+        futures = [ex.submit(run_one, s, args.engine) for s in specs]
+        for fut in as_completed(futures):
+            r = fut.result()
+            rows.append(r)
+            status = r["error"] or f"opt={r['optimal_cost']:.4f} greedy={r['greedy_cost']:.4f}"
+            print(f"[{len(rows)}/{len(specs)}] {r['dataset']}: {status} ({r['wall_seconds']:.2f}s)",
+                  file=sys.stderr)
+    rows.sort(key=lambda r: r["dataset"])
+    write_results(rows, args.out)
+    print(f"Wrote {args.out} ({len(rows)} datasets, {time.perf_counter() - t0:.1f}s)")
+
+if __name__ == "__main__":
+    main()
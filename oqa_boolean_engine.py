@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# Exact yes/no oracle over boolean attributes (25_*.json / 100_*.json) with bitmask states.
+
+import hashlib, json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from oqa_kary_oracle_dp import StateMemo, bitcount, ids_from_mask
+
+class BooleanOracleDP:
+    """
+    Optimal yes/no question tree under a uniform prior.
+    States are candidate bitmasks and each attribute has a precomputed "yes" mask,
+    so a split is two integer operations.  The memo (a StateMemo, mask ->
+    (cost, best_attr)) is filled bottom-up and trees are read back from it with
+    their costs, so no subtree is ever re-walked to price it.
+    Ties are broken as in KaryOracleDP (see its docstring).
+    """
+    def __init__(self, data: Dict[str, Dict[str, Any]], memo: Optional[StateMemo] = None,
+                 leaf_key: str = "items"):
+        if hasattr(data, "encoding"):
+            # Compiled dataset (oqa_dataset_bin): the True-value masks are prebuilt
+            self.ids, self.attrs, _, M = data.encoding()
+            self.yes = {a: M[a].get(True, 0) for a in self.attrs}
+        else:
+            self.ids = sorted(data.keys())
+            self.attrs = sorted({a for o in data.values() for a in o})
+            # Missing attributes count as "no"
+            self.yes = {a: sum(1 << k for k, oid in enumerate(self.ids) if data[oid].get(a))
+                        for a in self.attrs}
+        self.n = len(self.ids)
+        self.id2idx = {oid: k for k, oid in enumerate(self.ids)}
+        self.data = data
+        self.leaf_key = leaf_key
+        self.root = (1 << self.n) - 1
+        self.fingerprint = self._fingerprint()
+        self.memo = memo if memo is not None else StateMemo()
+        self.memo.bind(self.fingerprint)
+
+    def _fingerprint(self) -> str:
+        """Hash of the yes-mask encoding; a shared or persistent memo refuses other datasets."""
+        h = hashlib.sha256(b"boolean;")
+        h.update(json.dumps([self.ids, self.attrs]).encode())
+        for a in self.attrs:
+            h.update(f"{a}:{self.yes[a]:x};".encode())
+        return h.hexdigest()
+
+    @classmethod
+    def from_path(cls, path: str, **kwargs) -> "BooleanOracleDP":
+        """Load 25_*/100_*.json directly, or their compiled .oqabin form."""
+        if path.endswith(".oqabin"):
+            from oqa_dataset_bin import CompiledDataset
+            return cls(CompiledDataset(path), **kwargs)
+        with open(path, "r") as f:
+            return cls(json.load(f), **kwargs)
+
+    def mask_of(self, items: Iterable[str]) -> int:
+        S = 0
+        for oid in items:
+            S |= 1 << self.id2idx[oid]
+        return S
+
+    def ids_of(self, S: int):
+        return ids_from_mask(S, self.ids)
+
+    def optimal_cost(self, S: int) -> float:
+        if bitcount(S) <= 1:
+            return 0.0
+        hit = self.memo.get(S)
+        if hit is not None:
+            return hit[0]
+        best, best_a = self._evaluate(S)
+        self.memo.put(S, best, best_a)
+        return best
+
+    def _evaluate(self, S: int) -> Tuple[float, str]:
+        """Score every splitting attribute at S; returns (cost, best_attr)."""
+        n = bitcount(S)
+        best, best_a = float("inf"), ""
+        for a in self.attrs:
+            y = S & self.yes[a]
+            if not y or y == S:
+                continue
+            p_yes = bitcount(y) / n
+            cand = 1.0 + p_yes * self.optimal_cost(y) + (1.0 - p_yes) * self.optimal_cost(S ^ y)
+            if cand < best:
+                best, best_a = cand, a
+        if not best_a:
+            return 0.0, ""
+        return best, best_a
+
+    def solve(self, S: Optional[int] = None) -> float:
+        return self.optimal_cost(self.root if S is None else S)
+
+    def best_attr(self, S: int) -> str:
+        if bitcount(S) <= 1:
+            return ""
+        hit = self.memo.get(S)
+        if hit is not None:
+            return hit[1]
+        return self._evaluate(S)[1]
+
+    def q_value(self, S: int, a: str) -> float:
+        """Expected questions from S asking a first; a non-splitting a costs 1 + optimal_cost(S)."""
+        if a not in self.yes:
+            raise ValueError(f"unknown attribute {a!r}")
+        n = bitcount(S)
+        if n == 0:
+            return 1.0
+        y = S & self.yes[a]
+        p_yes = bitcount(y) / n
+        return 1.0 + p_yes * self.optimal_cost(y) + (1.0 - p_yes) * self.optimal_cost(S ^ y)
+
+    def evaluate_states(self, states, asked=None) -> List[Dict[str, Any]]:
+        """
+        Bulk state values for transcript scoring, as KaryOracleDP.evaluate_states:
+        one row per candidate id list with optimal_cost and optimal_attr, plus
+        q_value and regret for the attribute asked there.
+        """
+        masks = [self.mask_of(ids) for ids in states]
+        asked = list(asked) if asked is not None else [None] * len(masks)
+        if len(asked) != len(masks):
+            raise ValueError("asked must have one entry per state")
+        for S in sorted(set(masks), key=bitcount):
+            self.optimal_cost(S)
+        rows = []
+        for S, a in zip(masks, asked):
+            v = self.optimal_cost(S)
+            row = {"candidates": bitcount(S), "optimal_cost": v, "optimal_attr": self.best_attr(S)}
+            if a is not None:
+                q = self.q_value(S, a)
+                row.update(asked=a, q_value=q, regret=q - v)
+            rows.append(row)
+        return rows
+
+    def build_tree(self, S: Optional[int] = None) -> Tuple[Dict[str, Any], float]:
+        """
+        (tree, expected cost) for S in the oracle_solver_* format:
+        {"type": "attribute", "attribute": a, "yes": ..., "no": ...} or
+        {"type": "leaf", leaf_key: set(ids)}.
+        """
+        if S is None:
+            S = self.root
+        cost = self.optimal_cost(S)
+        a = self.best_attr(S)
+        if not a:
+            return {"type": "leaf", self.leaf_key: set(self.ids_of(S))}, cost
+        y = S & self.yes[a]
+        yes_sub, _ = self.build_tree(y)
+        no_sub, _ = self.build_tree(S ^ y)
+        return {"type": "attribute", "attribute": a, "yes": yes_sub, "no": no_sub}, cost
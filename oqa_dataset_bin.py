@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# Compact columnar dataset file (.oqabin) for the oracles, loaded with np.memmap.
+# Usage: python oqa_dataset_bin.py oqa_kary200_dataset.json [-o oqa_kary200_dataset.oqabin]
+#
+# Layout (little-endian, sections aligned to 8 bytes):
+#   magic    b"OQABIN01"
+#   uint64   header length H, then H bytes of JSON: n, d, ids, attrs, values per attr
+#   int8     n x d value-index matrix (row-major, index into values[attr])
+#   uint8    one (n+7)//8-byte bitmask per (attr, value), attrs then values in order
+# ids, attrs and values are sorted exactly as KaryOracleDP sorts them.
+
+import argparse, csv, json, os
+from collections.abc import Mapping
+from typing import Any, BinaryIO, Dict, List, Tuple
+
+import numpy as np
+
+MAGIC = b"OQABIN01"
+EXT = ".oqabin"
+
+def align(x: int) -> int:
+    """Round x up to the 8-byte section alignment of the binary formats."""
+    return (x + 7) & ~7
+
+# Header shared by the binary formats (.oqabin, .oqatree, .oqapol): an 8-byte magic whose
+# last two characters are the format version, a uint64 length H and H bytes of JSON.
+
+def write_header(f: BinaryIO, magic: bytes, meta: Dict[str, Any]) -> int:
+    """Write magic and JSON header; returns the offset just past them."""
+    header = json.dumps(meta, separators=(",", ":")).encode()
+    f.write(magic)
+    f.write(len(header).to_bytes(8, "little"))
+    f.write(header)
+    return 16 + len(header)
+
+def read_header(raw: np.ndarray, magic: bytes, path: str, kind: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Validate the magic and version of a memory-mapped file and parse its JSON header;
+    returns (meta, offset just past the header).  ValueError for any other file or a
+    truncated header.
+    """
+    head = bytes(raw[:8])
+    if len(head) < 8 or head[:6] != magic[:6]:
+        raise ValueError(f"{path} is not {kind}")
+    if head != magic:
+        raise ValueError(f"{path} is {kind} of version {head[6:].decode(errors='replace')}; "
+                         f"this reader supports version {magic[6:].decode()}")
+    hlen = int.from_bytes(bytes(raw[8:16]), "little")
+    if len(raw) < 16 + hlen:
+        raise ValueError(f"{path} is truncated")
+    return json.loads(bytes(raw[16:16 + hlen])), 16 + hlen
+
+def load_source(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    id -> {attr: value} from a dataset .json, a .csv whose first column is the id,
+    or an .ndjson stream of {"id": ..., "attrs": {...}} records (synthetic_generator).
+    """
+    if path.endswith(".ndjson"):
+        with open(path, "r") as f:
+            return {r["id"]: r["attrs"] for r in map(json.loads, f) if r}
+    if path.endswith(".csv"):
+        with open(path, "r", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            return {row[0]: dict(zip(header[1:], row[1:])) for row in reader}
+    with open(path, "r") as f:
+        return json.load(f)
+
+def compile_objects(objects: Dict[str, Dict[str, Any]], out_path: str) -> None:
+    ids = sorted(objects.keys())
+    attrs = sorted({a for o in objects.values() for a in o})
+    values = {a: sorted({objects[i][a] for i in ids}) for a in attrs}
+    n, d = len(ids), len(attrs)
+    for a in attrs:
+        if len(values[a]) > 127:
+            raise ValueError(f"attribute {a!r} has {len(values[a])} values; at most 127 fit in int8")
+    codes = np.zeros((n, d), dtype=np.int8)
+    for j, a in enumerate(attrs):
+        vidx = {v: k for k, v in enumerate(values[a])}
+        codes[:, j] = [vidx[objects[oid][a]] for oid in ids]
+    nbytes = (n + 7) // 8
+    # Bitmask rows from the value-index columns: one packbits per attribute
+    masks = []
+    for j, a in enumerate(attrs):
+        onehot = codes[:, j][None, :] == np.arange(len(values[a]), dtype=np.int8)[:, None]
+        masks.append(np.packbits(onehot, axis=1, bitorder="little").reshape(len(values[a]), nbytes))
+    with open(out_path, "wb") as f:
+        pos = write_header(f, MAGIC, {"n": n, "d": d, "ids": ids, "attrs": attrs, "values": values})
+        codes_at = align(pos)
+        masks_at = align(codes_at + n * d)
+        f.write(b"\0" * (codes_at - pos))
+        f.write(codes.tobytes())
+        f.write(b"\0" * (masks_at - codes_at - n * d))
+        for m in masks:
+            f.write(m.tobytes())
+
+def compile_dataset(src_path: str, out_path: str) -> None:
+    compile_objects(load_source(src_path), out_path)
+
+class CompiledDataset(Mapping):
+    """
+    Read-only view of an .oqabin file.  The value-index matrix and bitmasks stay
+    in the memory map; encoding() hands KaryOracleDP its ids, attributes, values
+    and masks without scanning objects.  Rows are also readable as
+    dataset[id] -> {attr: value}, so code that expects the JSON dict still works.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        meta, pos = read_header(raw, MAGIC, path, f"an {EXT} dataset")
+        self.n, self.d = meta["n"], meta["d"]
+        self.ids: List[str] = meta["ids"]
+        self.attrs: List[str] = meta["attrs"]
+        self.attr_vals: Dict[str, List[Any]] = meta["values"]
+        self.nbytes = (self.n + 7) // 8
+        codes_at = align(pos)
+        masks_at = align(codes_at + self.n * self.d)
+        self.codes = raw[codes_at:codes_at + self.n * self.d].view(np.int8).reshape(self.n, self.d)
+        total = sum(len(self.attr_vals[a]) for a in self.attrs)
+        self._masks = raw[masks_at:masks_at + total * self.nbytes].reshape(total, self.nbytes)
+        self._id2idx = {oid: k for k, oid in enumerate(self.ids)}
+
+    def value_masks(self) -> Dict[str, Dict[Any, int]]:
+        """attr -> {value: bitmask}, values in sorted order."""
+        M, r = {}, 0
+        for a in self.attrs:
+            M[a] = {}
+            for v in self.attr_vals[a]:
+                M[a][v] = int.from_bytes(self._masks[r].tobytes(), "little")
+                r += 1
+        return M
+
+    def encoding(self) -> Tuple[List[str], List[str], Dict[str, List[Any]], Dict[str, Dict[Any, int]]]:
+        return self.ids, self.attrs, self.attr_vals, self.value_masks()
+
+    def __getitem__(self, oid: str) -> Dict[str, Any]:
+        row = self.codes[self._id2idx[oid]].tolist()
+        return {a: self.attr_vals[a][c] for a, c in zip(self.attrs, row)}
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __reduce__(self):
+        # Worker processes reopen the map instead of pickling the rows
+        return (CompiledDataset, (self.path,))
+
+def load_objects(path: str):
+    """Dataset at path: a CompiledDataset for .oqabin, else the parsed JSON/CSV."""
+    if path.endswith(EXT):
+        return CompiledDataset(path)
+    return load_source(path)
+
+def main():
+    ap = argparse.ArgumentParser(description="Compile a dataset JSON/CSV into a memory-mappable .oqabin file")
+    ap.add_argument("source", help="Dataset .json (id -> {attr: value}), .csv (first column id) or .ndjson")
+    ap.add_argument("-o", "--out", default=None, help=f"Output path (default: source with {EXT})")
+    args = ap.parse_args()
+    out = args.out or os.path.splitext(args.source)[0] + EXT
+    compile_dataset(args.source, out)
+    print(f"Wrote {out} ({os.path.getsize(out)} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# Greedy expected-information-gain decision tree (the *_greedy_tree.json baselines).
+# Usage: python oqa_kary_greedy.py --dataset oqa_kary200_dataset.json [--save_tree T.json] [--optimal]
+
+import argparse, json, time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from oqa_kary_oracle_dp import KaryOracleDP
+from oqa_kary_numpy import KaryNumpyBackend
+from oqa_dataset_bin import load_objects
+
+def greedy_tree(oracle: KaryOracleDP, backend: Optional[KaryNumpyBackend] = None) -> Tuple[Dict[str, Any], float]:
+    """
+    Build the greedy EIG tree over all of oracle's objects; return (tree, expected depth).
+    Each node asks the attribute whose answer has maximal entropy under the uniform
+    prior (minimal sum c*log2 c over child sizes c), first attribute on ties.
+    The tree grows level by level: one bincount over (node, attribute, value) counts
+    every active object of the level at once, so the total work is O(n * d * depth).
+    Children appear in order of first appearance among the node's sorted ids;
+    leaves list their candidates in sorted order, matching the shipped JSON.
+    """
+    be = backend if backend is not None else KaryNumpyBackend(oracle)
+    n, d, kmax = be.n, be.d, be.kmax
+    dk = d * kmax
+    values = [list(oracle.M[a]) for a in oracle.attrs]
+    root: Dict[str, Any] = {}
+    if n == 0:
+        return {"type": "leaf", "candidates": [], "depth": 0}, 0.0
+
+    obj = np.arange(n)                    # active objects, grouped by node, ascending within a node
+    nid = np.zeros(n, dtype=np.int64)     # node of each active object at this level
+    slots: List[Tuple[Optional[Dict[str, Any]], Any]] = [(None, None)]  # (parent, answer) per node
+    total_depth = 0
+    depth = 0
+    while len(obj):
+        counts = np.bincount((nid[:, None] * dk + be.flat[obj]).ravel(),
+                             minlength=len(slots) * dk).reshape(len(slots), d, kmax)
+        sizes = counts[:, 0, :].sum(axis=1)
+        c = counts.astype(np.float64)
+        score = (c * np.log2(np.maximum(c, 1.0))).sum(axis=2)
+        score[(counts > 0).sum(axis=2) < 2] = np.inf
+        best = score.min(axis=1)
+        # First attribute within tolerance of the best score
+        j = np.argmax(score <= best[:, None] + 1e-9, axis=1)
+        leaf = ~np.isfinite(best)
+
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        nodes: List[Dict[str, Any]] = []
+        for k, (parent, value) in enumerate(slots):
+            if leaf[k]:
+                members = obj[starts[k]:starts[k] + sizes[k]].tolist()
+                node = {"type": "leaf", "candidates": [oracle.idx2id[i] for i in members], "depth": depth}
+                total_depth += depth * int(sizes[k])
+            else:
+                node = {"type": "node", "attribute": oracle.attrs[j[k]], "children": {}, "depth": depth}
+            if parent is None:
+                root.update(node)
+                node = root
+            else:
+                parent["children"][value] = node
+            nodes.append(node)
+
+        keep = ~leaf[nid]
+        obj, nid = obj[keep], nid[keep]
+        if not len(obj):
+            break
+        # Child key = (node, answer); number children by first appearance
+        key = nid * kmax + be.codes[obj, j[nid]]
+        uniq, first = np.unique(key, return_index=True)
+        order = np.argsort(first, kind="stable")
+        rank = np.empty(len(uniq), dtype=np.int64)
+        rank[order] = np.arange(len(uniq))
+        new_nid = rank[np.searchsorted(uniq, key)]
+        slots = []
+        for u in uniq[order].tolist():
+            k, v = divmod(u, kmax)
+            slots.append((nodes[k], values[j[k]][v]))
+        perm = np.argsort(new_nid, kind="stable")
+        obj, nid = obj[perm], new_nid[perm]
+        depth += 1
+    return root, total_depth / n
+
+def main():
+    ap = argparse.ArgumentParser(description="Greedy expected-information-gain decision tree")
+    ap.add_argument("--dataset", required=True,
+                    help="JSON/CSV mapping id -> {attr: value}, or a compiled .oqabin file")
+    ap.add_argument("--save_tree", default=None, help="Path to save greedy tree JSON")
+    ap.add_argument("--optimal", action="store_true",
+                    help="Also solve the exact DP and report the greedy gap")
+    args = ap.parse_args()
+
+    oracle = KaryOracleDP(load_objects(args.dataset))
+    print(f"Objects: {oracle.n}")
+    t0 = time.perf_counter()
+    tree, greedy = greedy_tree(oracle)
+    print(f"Greedy EIG expected number of queries (uniform prior): {greedy:.6f}  "
+          f"({time.perf_counter() - t0:.3f}s)")
+    if args.optimal:
+        opt = oracle.solve()
+        print(f"Optimal expected number of queries (uniform prior): {opt:.6f}  (gap {greedy - opt:+.6f})")
+    if args.save_tree:
+        with open(args.save_tree, "w") as f:
+            json.dump(tree, f, indent=2)
+        print(f"Saved greedy tree to: {args.save_tree}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# NumPy partition backend for KaryOracleDP: child sizes for every attribute of a
+# state, or of a whole batch of states, in one grouped reduction.
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from oqa_kary_oracle_dp import KaryOracleDP, bitcount
+
+class KaryNumpyBackend:
+    """
+    Dense encoding of an oracle's dataset:
+      codes  : objects x attributes matrix of value indices (order of oracle.M[a])
+      onehot : objects x (attributes * kmax) 0/1 matrix, column j*kmax + v
+    Value v of attribute j always refers to the v-th mask in oracle.M[attrs[j]].
+    """
+    def __init__(self, oracle: KaryOracleDP):
+        self.oracle = oracle
+        self.n = oracle.n
+        self.d = len(oracle.attrs)
+        self.kmax = max([len(oracle.M[a]) for a in oracle.attrs] + [1])
+        self.nbytes = (self.n + 7) // 8
+        self.masks: List[List[int]] = [list(oracle.M[a].values()) for a in oracle.attrs]
+        self.codes = np.zeros((self.n, self.d), dtype=np.int16)
+        for j, vm in enumerate(self.masks):
+            for v, m in enumerate(vm):
+                self.codes[self.unpack([m])[0].astype(bool), j] = v
+        self.flat = self.codes + (np.arange(self.d, dtype=np.int32) * self.kmax)
+        self.onehot = np.zeros((self.n, self.d * self.kmax), dtype=np.float32)
+        self.onehot[np.arange(self.n)[:, None], self.flat] = 1.0
+        # Prior-weighted one-hot (float64) so child masses are one masked matmul
+        self.wonehot = None
+        if oracle.weights is not None:
+            self.wonehot = self.onehot.astype(np.float64) * np.asarray(oracle.weights)[:, None]
+
+    def unpack(self, masks: Sequence[int]) -> np.ndarray:
+        """Batch of bitmasks -> (B, n) uint8 membership matrix."""
+        buf = b"".join(S.to_bytes(self.nbytes, "little") for S in masks)
+        raw = np.frombuffer(buf, dtype=np.uint8).reshape(len(masks), self.nbytes)
+        return np.unpackbits(raw, axis=1, bitorder="little")[:, :self.n]
+
+    def child_sizes(self, S: int) -> np.ndarray:
+        """(d, kmax) sizes of S & M[a][v] for every attribute/value of one state."""
+        idx = np.flatnonzero(self.unpack([S])[0])
+        counts = np.bincount(self.flat[idx].ravel(), minlength=self.d * self.kmax)
+        return counts.reshape(self.d, self.kmax)
+
+    def child_sizes_batch(self, masks: Sequence[int]) -> np.ndarray:
+        """(B, d, kmax) child sizes for a batch of states (one matrix product)."""
+        if not masks:
+            return np.zeros((0, self.d, self.kmax), dtype=np.int32)
+        counts = self.unpack(masks).astype(np.float32) @ self.onehot
+        return counts.astype(np.int32).reshape(len(masks), self.d, self.kmax)
+
+    def child_masses_batch(self, masks: Sequence[int]) -> np.ndarray:
+        """(B, d, kmax) prior mass of S & M[a][v] for a batch of states (weighted oracles)."""
+        masses = self.unpack(masks).astype(np.float64) @ self.wonehot
+        return masses.reshape(len(masks), self.d, self.kmax)
+
+def backend_for(oracle: KaryOracleDP) -> KaryNumpyBackend:
+    """The oracle's backend, built on first use and kept on the oracle."""
+    be = getattr(oracle, "_numpy_backend", None)
+    if be is None:
+        be = oracle._numpy_backend = KaryNumpyBackend(oracle)
+    return be
+
+def solve_batched(oracle: KaryOracleDP, S: Optional[int] = None, batch_size: int = 4096) -> float:
+    """
+    Exhaustive DP over the states reachable from S using batched partitions.
+    Discovery runs level by level, one child_sizes_batch call per chunk of the
+    frontier; scoring then runs bottom-up by popcount with every (state, attribute)
+    pair of a popcount bucket evaluated as array operations.  Child terms are added
+    in value order exactly like optimal_cost, so costs and policy match bit for bit.
+    With a non-uniform prior, children are weighted by mass from one float64 matmul
+    per chunk; costs then agree with optimal_cost up to rounding of the masses.
+    Results are written to oracle's memo.
+    """
+    if S is None:
+        S = oracle.root
+    if bitcount(S) <= 1:
+        return 0.0
+    hit = oracle._lookup(S)
+    if hit is not None:
+        return hit[0]
+    be = backend_for(oracle)
+    d, kmax = be.d, be.kmax
+
+    index: Dict[int, int] = {S: 0}
+    states: List[int] = [S]
+    sizes_rows: List[np.ndarray] = []
+    mass_rows: List[np.ndarray] = []
+    kid_rows: List[np.ndarray] = []
+
+    frontier = [S]
+    while frontier:
+        nxt: List[int] = []
+        for lo in range(0, len(frontier), batch_size):
+            chunk = frontier[lo:lo + batch_size]
+            sizes = be.child_sizes_batch(chunk)
+            splits = (sizes > 0).sum(axis=2) >= 2
+            kids = np.full((len(chunk), d, kmax), -1, dtype=np.int32)
+            # Only children with >= 2 objects become states; flat loop over them
+            bs, js, vs = np.nonzero((sizes > 1) & splits[:, :, None])
+            ks = []
+            for b, j, v in zip(bs.tolist(), js.tolist(), vs.tolist()):
+                child = chunk[b] & be.masks[j][v]
+                k = index.get(child)
+                if k is None:
+                    k = index[child] = len(states)
+                    states.append(child)
+                    nxt.append(child)
+                ks.append(k)
+            kids[bs, js, vs] = ks
+            sizes[~splits] = 0
+            sizes_rows.append(sizes)
+            if be.wonehot is not None:
+                mass_rows.append(be.child_masses_batch(chunk))
+            kid_rows.append(kids)
+        frontier = nxt
+
+    sizes_all = np.concatenate(sizes_rows)
+    kids_all = np.concatenate(kid_rows)
+    pop = np.array([bitcount(T) for T in states])
+    mass_all = np.concatenate(mass_rows) if mass_rows else None
+    cost = np.zeros(len(states) + 1)  # slot -1 (size <= 1 child) stays 0.0
+    best = np.full(len(states), -1, dtype=np.int32)
+
+    order = np.argsort(pop, kind="stable")
+    bounds = np.flatnonzero(np.diff(pop[order])) + 1
+    for group in np.split(order, bounds):
+        sz = sizes_all[group]
+        if mass_all is None:
+            w = sz / pop[group][:, None, None].astype(np.float64)
+        else:
+            # Children of any one attribute partition the state, so its row sums to the parent mass
+            mg = mass_all[group]
+            w = mg / mg[:, 0, :].sum(axis=1)[:, None, None]
+        c = cost[kids_all[group]]
+        exp_res = np.zeros((len(group), d))
+        for v in range(kmax):
+            exp_res = exp_res + w[:, :, v] * c[:, :, v]
+        cand = 1.0 + exp_res
+        cand[(sz > 0).sum(axis=2) < 2] = np.inf
+        j = np.argmin(cand, axis=1)
+        val = cand[np.arange(len(group)), j]
+        ok = np.isfinite(val)
+        cost[group[ok]] = val[ok]
+        best[group[ok]] = j[ok]
+
+    for k, T in enumerate(states):
+        a = oracle.attrs[best[k]] if best[k] >= 0 else ""
+        oracle._record(T, float(cost[k]), a)
+    return float(cost[0])
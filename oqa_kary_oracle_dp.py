@@ -2,31 +2,287 @@
 #!/usr/bin/env python3
 # Exact k-ary oracle via DP + per-turn expected candidates/entropy curves.
 
-import argparse, json, math
-from functools import lru_cache
-from typing import Dict, List, Any
+import argparse, hashlib, itertools, json, math
+from typing import Dict, List, Any, Optional, Tuple
+
+from oqa_memo import StateMemo
 
 def bitcount(x: int) -> int:
     return x.bit_count()
 
+# Set-bit positions of every byte value, for decoding masks a byte at a time
+_BYTE_BITS = [tuple(j for j in range(8) if b >> j & 1) for b in range(256)]
+
+def mask_indices(mask: int) -> List[int]:
+    """Ascending indices of the set bits of mask: one table lookup per nonzero byte."""
+    out = []
+    for k, b in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, "little")):
+        if b:
+            base = 8 * k
+            out.extend(base + j for j in _BYTE_BITS[b])
+    return out
+
+def ids_from_mask(mask: int, index2id: List[str]) -> List[str]:
+    return [index2id[i] for i in mask_indices(mask)]
+
+def huffman_depth_bound(m: int, k: int) -> float:
+    """
+    Minimal expected depth of a tree with at most k children per node over m
+    equiprobable leaves (equal-weight k-ary Huffman): fill depth D = floor(log_k m)
+    and split ceil(e/(k-1)) of its nodes to place the e = m - k^D extra leaves.
+    """
+    if m <= 1:
+        return 0.0
+    D, p = 0, 1
+    while p * k <= m:
+        p *= k
+        D += 1
+    e = m - p
+    return (D * m + e + -(-e // (k - 1))) / m
+
+# States this small are scored exhaustively even with bnb
+BNB_MIN_SIZE = 8
+
+class PartitionCache:
+    """
+    Split of the chosen attribute per solved state: mask -> (attr, ((value, child), ...)),
+    or ("", ()) for terminal states.  Filled while the DP scores a state and read back
+    by tree construction, curve generation and _is_leaf.  The attribute is kept with
+    its pairs: in canonical mode the memo may name a tied alternative, and a label
+    taken from there would not match the cached children.  It has its own cap;
+    the oldest entries go first, which are the smallest states since the DP
+    finishes bottom-up, so the states near the root survive.
+    """
+    def __init__(self, max_entries: Optional[int] = 1 << 16, evict_fraction: float = 0.25):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.evict_fraction = evict_fraction
+        self._table: Dict[int, Tuple[str, Tuple[Tuple[Any, int], ...]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def get(self, S: int) -> Optional[Tuple[str, Tuple[Tuple[Any, int], ...]]]:
+        entry = self._table.get(S)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, S: int, attr: str, parts: Tuple[Tuple[Any, int], ...]) -> None:
+        self._table[S] = (attr, parts)
+        if self.max_entries is not None and len(self._table) > self.max_entries:
+            k = max(1, int(self.max_entries * self.evict_fraction))
+            for old in list(itertools.islice(self._table, k)):
+                del self._table[old]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._table), "hits": self.hits, "misses": self.misses,
+                "max_entries": self.max_entries}
+
+class MassTable(dict):
+    """
+    Prior mass per candidate bitmask: mask -> sum of the weights of its objects.
+    A miss is summed from one 256-entry table per byte of the mask (an add per
+    byte) and cached, since the DP asks for the same children from many parents.
+    Singletons are always present; the cache is reset once it reaches max_entries.
+    """
+    def __init__(self, weights: List[float], max_entries: int = 1 << 20):
+        super().__init__()
+        self.n = len(weights)
+        self.nbytes = (self.n + 7) // 8
+        self.max_entries = max_entries
+        self._padded = list(weights) + [0.0] * (8 * self.nbytes - self.n)
+        self._tables = self._byte_tables(self._padded)
+        self._plogp_tables: Optional[List[List[float]]] = None
+        self._singletons = {1 << k: w for k, w in enumerate(weights)}
+        self.update(self._singletons)
+
+    def _byte_tables(self, vals: List[float]) -> List[List[float]]:
+        tables = []
+        for c in range(self.nbytes):
+            t = [0.0] * 256
+            for b in range(1, 256):
+                low = b & -b
+                t[b] = t[b ^ low] + vals[8 * c + low.bit_length() - 1]
+            tables.append(t)
+        return tables
+
+    def _sum(self, tables: List[List[float]], S: int) -> float:
+        return math.fsum(map(list.__getitem__, tables, S.to_bytes(self.nbytes, "little")))
+
+    def __missing__(self, S: int) -> float:
+        if len(self) >= self.max_entries:
+            self.clear()
+            self.update(self._singletons)
+        m = self[S] = self._sum(self._tables, S)
+        return m
+
+    def plogp(self, S: int) -> float:
+        """Sum of -w*log2(w) over the objects of S (not cached)."""
+        if self._plogp_tables is None:
+            self._plogp_tables = self._byte_tables([-w * math.log2(w) if w > 0 else 0.0 for w in self._padded])
+        return self._sum(self._plogp_tables, S)
+
+def load_weights(path: str) -> Dict[str, float]:
+    """Prior weights sidecar: JSON {id: weight} or CSV rows id,weight (header optional)."""
+    if path.endswith(".csv"):
+        import csv
+        out = {}
+        with open(path, "r", newline="") as f:
+            first = True
+            for row in csv.reader(f):
+                if not any(cell.strip() for cell in row):
+                    continue
+                try:
+                    out[row[0]] = float(row[1])
+                except (IndexError, ValueError):
+                    # Only the first non-blank row may be a header
+                    if not first:
+                        raise ValueError(f"bad weights row in {path}: {row}")
+                first = False
+        return out
+    with open(path, "r") as f:
+        return {k: float(v) for k, v in json.load(f).items()}
+
+ENGINES = ("recursive", "iterative", "numpy")
+
 class KaryOracleDP:
-    def __init__(self, objects: Dict[str, Dict[str, str]]):
-        self.ids = sorted(objects.keys())
+    """
+    Optimal question policy over k-ary attributes by DP over candidate bitmasks.
+    Tie-breaking, which every exact engine in the repo follows so their trees agree:
+    attributes are scored in sorted order (self.attrs) and a candidate replaces the
+    incumbent only when strictly cheaper, so the first attribute wins ties.  bnb
+    scores them in another order but compares attribute positions on equal costs.
+    """
+    def __init__(self, objects: Dict[str, Dict[str, str]], memo: Optional[StateMemo] = None,
+                 bnb: bool = False, engine: str = "recursive", canonical: bool = False,
+                 canonical_max_size: int = 8, partitions: Optional[PartitionCache] = None,
+                 weights: Optional[Dict[str, float]] = None):
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}")
+        if bnb and engine != "recursive":
+            raise ValueError("branch-and-bound is only available with the recursive engine")
+        if weights is not None and (bnb or canonical):
+            raise ValueError("a non-uniform prior cannot be combined with bnb or canonical mode")
+        if hasattr(objects, "encoding"):
+            # Compiled dataset (oqa_dataset_bin): masks and value indices are prebuilt
+            self.ids, self.attrs, self.attr_vals, self.M = objects.encoding()
+            codes = objects.codes.tolist()
+        else:
+            self.ids = sorted(objects.keys())
+            self.attrs = sorted({a for o in objects.values() for a in o})
+            self.attr_vals = {a: sorted({objects[i][a] for i in self.ids}) for a in self.attrs}
+            vidx = {a: {v: k for k, v in enumerate(self.attr_vals[a])} for a in self.attrs}
+            codes = [[vidx[a][objects[oid][a]] for a in self.attrs] for oid in self.ids]
+            # Precompute bitmasks for (attr, value) in one pass over the value indices
+            self.M = {a: {} for a in self.attrs}
+            for j, a in enumerate(self.attrs):
+                bits = [bytearray((len(self.ids) + 7) // 8) for _ in self.attr_vals[a]]
+                for k, row in enumerate(codes):
+                    bits[row[j]][k >> 3] |= 1 << (k & 7)
+                for v, b in zip(self.attr_vals[a], bits):
+                    self.M[a][v] = int.from_bytes(b, "little")
         self.n = len(self.ids)
-        self.attrs = sorted({a for o in objects.values() for a in o})
-        self.attr_vals = {a: sorted({objects[i][a] for i in self.ids}) for a in self.attrs}
         self.id2idx = {oid: k for k, oid in enumerate(self.ids)}
-        # Precompute bitmasks for (attr, value)
-        self.M = {a: {} for a in self.attrs}
-        for a in self.attrs:
-            for v in self.attr_vals[a]:
-                m = 0
-                for oid in self.ids:
-                    if objects[oid][a] == v:
-                        m |= 1 << self.id2idx[oid]
-                self.M[a][v] = m
+        self.idx2id = self.ids[:]
+        self.objects = objects
+        self.engine = engine
         self.root = (1 << self.n) - 1
-        self._best_attr: Dict[int, str] = {}
+        # Prior: uniform unless per-object weights are given; children are weighted
+        # by mass(child) / mass(S), so the uniform mass is simply the popcount
+        self.weights: Optional[List[float]] = None
+        self.prior: Optional[Dict[str, float]] = None
+        self._mass = bitcount
+        if weights is not None:
+            self._init_prior(weights)
+        self.fingerprint = self._fingerprint()
+        self.memo = memo if memo is not None else StateMemo()
+        # Canonical mode: isomorphic states (values relabelled within an attribute,
+        # attributes permuted) share one memo entry keyed by their signature.
+        # Symmetry concentrates in small states, so larger ones keep mask keys.
+        # Signatures are costly to compute: this saves memory at 8-20x the solve time.
+        self.canonical = canonical
+        self.canonical_max_size = canonical_max_size
+        self.attr_idx = {a: j for j, a in enumerate(self.attrs)}
+        if canonical:
+            self.memo.bind(self.fingerprint + ":canonical")
+            self._codes = [tuple(row) for row in codes]
+            self._lookup, self._store = self._lookup_canonical, self._store_canonical
+        else:
+            self.memo.bind(self.fingerprint)
+            self._lookup, self._store = self.memo.get, self.memo.put
+        self.partitions = partitions if partitions is not None else PartitionCache()
+        # Per-state curve profiles under the optimal policy (see state_profile)
+        self._profiles: Dict[int, Tuple[List[float], ...]] = {}
+        # Branch-and-bound: admissible per-state lower bounds on the optimal cost
+        self.bnb = bnb
+        self.pruned = 0
+        self.kmax = max([len(self.M[a]) for a in self.attrs] + [2])
+        classes: Dict[tuple, List[int]] = {}
+        for k, row in enumerate(codes):
+            classes.setdefault(tuple(row), []).append(k)
+        # Duplicate attribute vectors make some leaves irreducible; fall back to an entropy bound
+        self._class_masks = None
+        self._singletons = 0
+        if len(classes) < self.n:
+            self._class_masks = [sum(1 << k for k in ks) for ks in classes.values() if len(ks) > 1]
+            self._singletons = self.root & ~sum(self._class_masks)
+        self._lb_by_size = [huffman_depth_bound(m, self.kmax) for m in range(self.n + 1)] if bnb else []
+        self._clogc = [c * math.log(c) if c else 0.0 for c in range(self.n + 1)] if bnb else []
+        # Entropy bounds of child states, which recur under many parents and attributes
+        self._class_bounds: Dict[int, float] = {}
+
+    def _fingerprint(self) -> str:
+        """Hash of the dataset encoding; equal fingerprints mean masks are interchangeable."""
+        h = hashlib.sha256()
+        h.update(json.dumps([self.ids, self.attrs]).encode())
+        for a in self.attrs:
+            for v, m in self.M[a].items():
+                h.update(f"{a}={v}:{m:x};".encode())
+        if self.weights is not None:
+            # Costs depend on the prior, so prior-aware memos never mix with uniform ones
+            h.update(json.dumps(self.weights).encode())
+        return h.hexdigest()
+
+    def _init_prior(self, weights: Dict[str, float]) -> None:
+        missing = [oid for oid in self.ids if oid not in weights]
+        if missing:
+            raise ValueError(f"weights missing for {len(missing)} objects, e.g. {missing[:3]}")
+        unknown = set(weights) - set(self.id2idx)
+        if unknown:
+            raise ValueError(f"weights given for unknown ids, e.g. {sorted(unknown)[:3]}")
+        raw = [float(weights[oid]) for oid in self.ids]
+        if min(raw, default=1.0) <= 0.0:
+            raise ValueError("weights must be positive")
+        if len(set(raw)) <= 1:
+            # Equal weights are the uniform prior: keep the popcount path, so costs,
+            # trees and curves are bit-identical to a run without weights
+            return
+        total = math.fsum(raw)
+        self.weights = [w / total for w in raw]
+        self.prior = dict(zip(self.ids, self.weights))
+        self._masses = MassTable(self.weights)
+        # Bound dict lookup: a cached mass costs about as much as a popcount
+        self._mass = self._masses.__getitem__
+
+    def mass(self, S: int) -> float:
+        """Prior probability of S (its size over n under the uniform prior)."""
+        return self._mass(S) if self.weights is not None else bitcount(S) / self.n
+
+    def entropy(self, S: int) -> float:
+        """Shannon entropy (bits) of the prior restricted to S."""
+        size = bitcount(S)
+        if size <= 1:
+            return 0.0
+        if self.weights is None:
+            return math.log2(size)
+        m = self._mass(S)
+        return max(0.0, self._masses.plogp(S) / m + math.log2(m))
 
     def _children(self, S: int, a: str) -> List[int]:
         kids = []
@@ -36,19 +292,186 @@ class KaryOracleDP:
                 kids.append(sub)
         return kids
 
+    def _split_pairs(self, S: int, a: str) -> Tuple[Tuple[Any, int], ...]:
+        return tuple((v, S & mv) for v, mv in self.M[a].items() if S & mv and S & mv != S)
+
+    def _split(self, S: int) -> Tuple[str, Tuple[Tuple[Any, int], ...]]:
+        """Chosen attribute at S and its (value, child) pairs; ("", ()) when terminal."""
+        if bitcount(S) <= 1:
+            return "", ()
+        entry = self.partitions.get(S)
+        if entry is not None:
+            return entry
+        a = self.best_attr(S)
+        pairs = self._split_pairs(S, a) if a else ()
+        self.partitions.put(S, a, pairs)
+        return a, pairs
+
+    def _record(self, S: int, cost: float, a: str) -> None:
+        # Memoize the solved state and remember how its chosen attribute splits it
+        self._store(S, cost, a)
+        self.partitions.put(S, a, self._split_pairs(S, a) if a else ())
+
     def _is_leaf(self, S: int) -> bool:
         if bitcount(S) <= 1:
             return True
+        entry = self.partitions.get(S)
+        if entry is not None:
+            return not entry[1]
         for a in self.attrs:
             if len(self._children(S, a)) > 1:
                 return False
         return True
 
-    @lru_cache(maxsize=None)
     def optimal_cost(self, S: int) -> float:
         n = bitcount(S)
         if n <= 1:
             return 0.0
+        hit = self._lookup(S)
+        if hit is not None:
+            return hit[0]
+        best, best_a = self._evaluate(S)
+        self._record(S, best, best_a)
+        return best
+
+    def _signature(self, S: int) -> Tuple[tuple, List[int]]:
+        """
+        Canonical signature of S and the attribute index behind each signature column.
+        Attributes constant on S are dropped; objects are ordered by the sorted
+        frequencies of their values, values relabelled by (descending frequency,
+        first appearance) and columns sorted by (frequency profile, relabelled
+        column).  The signature is the sorted multiset of relabelled rows, so equal
+        signatures always mean isomorphic states (a few isomorphic states may
+        still get different signatures).
+        """
+        rows = []
+        while S:
+            low = S & -S
+            rows.append(self._codes[low.bit_length() - 1])
+            S ^= low
+        live, counts = [], []
+        for j in range(len(self.attrs)):
+            c: Dict[int, int] = {}
+            for r in rows:
+                c[r[j]] = c.get(r[j], 0) + 1
+            if len(c) > 1:
+                live.append(j)
+                counts.append(c)
+        inv = [tuple(sorted(c[r[j]] for j, c in zip(live, counts))) for r in rows]
+        rows = [rows[i] for i in sorted(range(len(rows)), key=inv.__getitem__)]
+        cols = []
+        for j, c in zip(live, counts):
+            first: Dict[int, int] = {}
+            for p, r in enumerate(rows):
+                first.setdefault(r[j], p)
+            vals = sorted(c, key=lambda v: (-c[v], first[v]))
+            relabel = {v: k for k, v in enumerate(vals)}
+            cols.append((tuple(c[v] for v in vals), tuple(relabel[r[j]] for r in rows), j))
+        cols.sort()
+        if not cols:
+            return ((),) * len(rows), []
+        return tuple(sorted(zip(*[col for _, col, _ in cols]))), [j for _, _, j in cols]
+
+    def _lookup_canonical(self, S: int) -> Optional[Tuple[float, str]]:
+        if bitcount(S) > self.canonical_max_size:
+            return self.memo.get(S)
+        key, cols = self._signature(S)
+        entry = self.memo.get(key)
+        if entry is None:
+            return None
+        # Translate the representative's column back to this state's attribute
+        return entry[0], (self.attrs[cols[entry[1]]] if entry[1] >= 0 else "")
+
+    def _store_canonical(self, S: int, cost: float, attr: str) -> None:
+        if bitcount(S) > self.canonical_max_size:
+            self.memo.put(S, cost, attr)
+            return
+        key, cols = self._signature(S)
+        if key not in self.memo:
+            self.memo.put(key, cost, cols.index(self.attr_idx[attr]) if attr else -1)
+
+    def solve(self, S: Optional[int] = None) -> float:
+        """Optimal cost of S (default: root) with the configured engine."""
+        if S is None:
+            S = self.root
+        if bitcount(S) > 1:
+            hit = self._lookup(S)
+            if hit is not None:
+                return hit[0]
+        if self.engine == "iterative":
+            return self.solve_iterative(S)
+        if self.engine == "numpy":
+            from oqa_kary_numpy import solve_batched
+            return solve_batched(self, S)
+        return self.optimal_cost(S)
+
+    def options(self) -> Dict[str, Any]:
+        """Constructor keywords that reproduce this oracle's solve behaviour."""
+        return {"bnb": self.bnb, "engine": self.engine, "canonical": self.canonical,
+                "canonical_max_size": self.canonical_max_size,
+                "weights": self.prior}
+
+    def solve_iterative(self, S: int) -> float:
+        """
+        Explicit-stack version of optimal_cost: same cost and policy, no Python
+        recursion.  A state is expanded once to list its partitions and push
+        unsolved children, then scored when it surfaces again with every
+        child in the memo (a child evicted meanwhile is re-solved recursively).
+        """
+        if bitcount(S) <= 1:
+            return 0.0
+        stack: List[Tuple[int, Optional[list]]] = [(S, None)]
+        while stack:
+            T, splits = stack[-1]
+            if splits is None:
+                if self._lookup(T) is not None:
+                    stack.pop()
+                    continue
+                splits = []
+                pending = []
+                for a in self.attrs:
+                    parts = self._children(T, a)
+                    if len(parts) <= 1:
+                        continue
+                    splits.append((a, parts))
+                    for child in parts:
+                        if bitcount(child) > 1 and self._lookup(child) is None:
+                            pending.append((child, None))
+                stack[-1] = (T, splits)
+                if pending:
+                    stack.extend(pending)
+                    continue
+            stack.pop()
+            n = self._mass(T)
+            best, best_a = float("inf"), None
+            for a, parts in splits:
+                exp_res = 0.0
+                for child in parts:
+                    if bitcount(child) <= 1:
+                        c = 0.0
+                    else:
+                        entry = self._lookup(child)
+                        c = entry[0] if entry is not None else self.optimal_cost(child)
+                    exp_res += (self._mass(child)/n) * c
+                cand = 1.0 + exp_res
+                if cand < best:
+                    best, best_a = cand, a
+            if best_a is None:
+                self._record(T, 0.0, "")
+            else:
+                self._record(T, best, best_a)
+        entry = self._lookup(S)
+        return entry[0] if entry is not None else self.optimal_cost(S)
+
+    def _evaluate(self, S: int) -> Tuple[float, str]:
+        """Score every splitting attribute at S; returns (cost, best_attr)."""
+        if self.bnb:
+            return self._evaluate_bnb(S)
+        return self._evaluate_exhaustive(S)
+
+    def _evaluate_exhaustive(self, S: int) -> Tuple[float, str]:
+        mass = self._mass
+        n = mass(S)
         best, best_a = float("inf"), None
         for a in self.attrs:
             parts = self._children(S, a)
@@ -56,67 +479,354 @@ class KaryOracleDP:
                 continue
             exp_res = 0.0
             for child in parts:
-                exp_res += (bitcount(child)/n) * self.optimal_cost(child)
+                exp_res += (mass(child)/n) * self.optimal_cost(child)
             cand = 1.0 + exp_res
             if cand < best:
                 best, best_a = cand, a
         if best_a is None:
-            self._best_attr[S] = ""
+            return 0.0, ""
+        return best, best_a
+
+    def _lower_bound(self, S: int) -> float:
+        """Admissible lower bound on optimal_cost(S)."""
+        if self._class_masks is None:
+            return self._lb_by_size[bitcount(S)]
+        m = bitcount(S)
+        if m <= 1:
             return 0.0
-        self._best_attr[S] = best_a
-        return best
+        h = bitcount(S & self._singletons) * math.log2(m) / m
+        for cm in self._class_masks:
+            c = bitcount(S & cm)
+            if c:
+                h -= (c/m) * math.log2(c/m)
+        return h / math.log2(self.kmax)
+
+    def _class_bound(self, S: int) -> float:
+        lb = self._class_bounds.get(S)
+        if lb is None:
+            lb = self._class_bounds[S] = self._lower_bound(S)
+        return lb
+
+    def _evaluate_bnb(self, S: int) -> Tuple[float, str]:
+        """
+        Same result as the exhaustive loop, bit for bit: attributes are tried in
+        order of greedy information gain so a strong incumbent appears early, and an
+        attribute is abandoned once its solved children plus the lower bounds of the
+        unsolved ones exceed the incumbent.  Children are always solved exactly and
+        each candidate cost is summed in the original child order; ties go to the
+        attribute that comes first in self.attrs, as in the exhaustive loop.
+        States of at most BNB_MIN_SIZE candidates are scored exhaustively, and entropy
+        bounds (datasets with duplicate vectors) are cached per child state.
+        """
+        n = bitcount(S)
+        if n <= BNB_MIN_SIZE:
+            # Too small for pruning to repay the ordering and bookkeeping
+            return self._evaluate_exhaustive(S)
+        lb_of = self._lb_by_size.__getitem__ if self._class_masks is None else None
+        clogc = self._clogc
+        cands = []
+        for i, a in enumerate(self.attrs):
+            parts = self._children(S, a)
+            if len(parts) <= 1:
+                continue
+            sizes = [bitcount(p) for p in parts]
+            lbs = list(map(lb_of, sizes)) if lb_of else [self._class_bound(p) for p in parts]
+            # Ascending sum c*log(c) == descending entropy of the split
+            cands.append((sum(clogc[c] for c in sizes), i, a, parts, sizes, lbs))
+        if not cands:
+            return 0.0, ""
+        cands.sort(key=lambda t: (t[0], t[1]))
+
+        tol = 1e-9
+        best, best_i, best_a = float("inf"), -1, None
+        for _, i, a, parts, sizes, lbs in cands:
+            limit = (best + tol - 1.0) * n
+            bound = 0.0
+            for c, lb in zip(sizes, lbs):
+                bound += c * lb
+            if bound > limit:
+                self.pruned += len(parts)
+                continue
+            costs = [0.0] * len(parts)
+            order = sorted(range(len(parts)), key=sizes.__getitem__, reverse=True)
+            cut = False
+            for r, j in enumerate(order):
+                costs[j] = self.optimal_cost(parts[j])
+                bound += sizes[j] * (costs[j] - lbs[j])
+                if bound > limit:
+                    self.pruned += len(order) - r - 1
+                    cut = True
+                    break
+            if cut:
+                continue
+            exp_res = 0.0
+            for j in range(len(parts)):
+                exp_res += (sizes[j]/n) * costs[j]
+            cand = 1.0 + exp_res
+            if cand < best or (cand == best and i < best_i):
+                best, best_i, best_a = cand, i, a
+        return best, best_a
+
+    def best_attr(self, S: int) -> str:
+        """Optimal question at S ("" for leaves); re-solves S if it was evicted."""
+        if bitcount(S) <= 1:
+            return ""
+        entry = self._lookup(S)
+        if entry is None:
+            cost, a = self._evaluate(S)
+            self._record(S, cost, a)
+            return a
+        return entry[1]
+
+    def mask_of(self, ids) -> int:
+        S = 0
+        for oid in ids:
+            S |= 1 << self.id2idx[oid]
+        return S
+
+    def q_value(self, S: int, a: str) -> float:
+        """
+        Expected questions from S when a is asked first and play is optimal after.
+        An attribute that does not split S wastes the turn: 1 + optimal_cost(S).
+        """
+        if a not in self.M:
+            raise ValueError(f"unknown attribute {a!r}")
+        m = self._mass(S)
+        q = 1.0
+        for mv in self.M[a].values():
+            child = S & mv
+            if child:
+                q += (self._mass(child)/m) * self.solve(child)
+        return q
+
+    def evaluate_states(self, states, asked=None) -> List[Dict[str, Any]]:
+        """
+        Bulk state values for scoring transcripts: states are candidate id lists,
+        asked the attribute asked at each one (or None).  Distinct states are solved
+        once, smallest first, against the shared memo.  Each row has candidates,
+        optimal_cost and optimal_attr, plus q_value and regret when asked is given.
+        """
+        masks = [self.mask_of(ids) for ids in states]
+        asked = list(asked) if asked is not None else [None] * len(masks)
+        if len(asked) != len(masks):
+            raise ValueError("asked must have one entry per state")
+        for S in sorted(set(masks), key=bitcount):
+            self.solve(S)
+        rows = []
+        for S, a in zip(masks, asked):
+            v = self.solve(S)
+            row = {"candidates": bitcount(S), "optimal_cost": v, "optimal_attr": self.best_attr(S)}
+            if a is not None:
+                q = self.q_value(S, a)
+                row.update(asked=a, q_value=q, regret=q - v)
+            rows.append(row)
+        return rows
+
+    def build_optimal_tree(self, S: int = None) -> Dict[str, Any]:
+        """Reconstruct one optimal tree."""
+        if S is None:
+            S = self.root
+        if self.engine == "iterative":
+            return self.build_optimal_tree_iterative(S)
+        node = self._tree_node(S)
+        for entry in node.get("children", ()):
+            entry["subtree"] = self.build_optimal_tree(entry.pop("mask"))
+        return node
+
+    def build_optimal_tree_iterative(self, S: int) -> Dict[str, Any]:
+        """Same tree as build_optimal_tree, built with an explicit stack."""
+        root = self._tree_node(S)
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for entry in node.get("children", ()):
+                entry["subtree"] = self._tree_node(entry.pop("mask"))
+                stack.append(entry["subtree"])
+        return root
+
+    def _tree_node(self, S: int) -> Dict[str, Any]:
+        # Children carry their mask until the caller replaces it with a subtree
+        size = bitcount(S)
+        a, pairs = self._split(S)
+        if not a:
+            node = {"type": "leaf", "size": size, "ids": ids_from_mask(S, self.idx2id)}
+        else:
+            children = [{"value": v, "subset_size": bitcount(child), "mask": child} for v, child in pairs]
+            node = {"type": "node", "attribute": a, "size": size, "children": children}
+            if self.weights is not None:
+                for entry in children:
+                    entry["subset_mass"] = self._mass(entry["mask"])
+        if self.weights is not None:
+            node["mass"] = self._mass(S)
+        return node
+
+    def state_profile(self, S: int) -> Dict[str, List[float]]:
+        """
+        Remaining-dialog profile of S under the optimal policy, prior restricted to S.
+        Lists indexed by turn t = 0..h (h = height of the policy below S):
+          - 'E_candidates', 'E_entropy_bits', 'leaf_mass' as in expected_curve
+          - 'depth_pmf': probability that exactly t more questions are asked
+        Profiles combine bottom-up over the policy (explicit stack, no re-simulation):
+        a parent's entry t is the child-mass-weighted sum of its children's entry
+        t-1, and a terminal state keeps its values from then on.
+        """
+        stack = [(S, False)]
+        while stack:
+            T, ready = stack.pop()
+            if T in self._profiles:
+                continue
+            size = bitcount(T)
+            _, pairs = self._split(T)
+            if not pairs:
+                self._profiles[T] = ([float(size)], [self.entropy(T)], [1.0], [1.0])
+                continue
+            if not ready:
+                stack.append((T, True))
+                stack.extend((c, False) for _, c in pairs if c not in self._profiles)
+                continue
+            m = self._mass(T)
+            kids = [((self._mass(c)/m), self._profiles[c]) for _, c in pairs]
+            h = 1 + max(len(k[0]) for _, k in kids)
+            E_n, E_H, leaf, pmf = [float(size)], [self.entropy(T)], [0.0], [0.0]
+            for t in range(1, h):
+                n_t = H_t = l_t = d_t = 0.0
+                for w, (kn, kh, kl, kd) in kids:
+                    j = min(t - 1, len(kn) - 1)
+                    n_t += w * kn[j]
+                    H_t += w * kh[j]
+                    l_t += w * kl[j]
+                    if t - 1 < len(kd):
+                        d_t += w * kd[t - 1]
+                E_n.append(n_t)
+                E_H.append(H_t)
+                leaf.append(l_t)
+                pmf.append(d_t)
+            self._profiles[T] = (E_n, E_H, leaf, pmf)
+        E_n, E_H, leaf, pmf = self._profiles[S]
+        return {"E_candidates": E_n, "E_entropy_bits": E_H, "leaf_mass": leaf, "depth_pmf": pmf}
 
     def expected_curve(self):
-        """Return dict with lists: turn, E_candidates, E_entropy_bits, leaf_mass."""
-        import math
-        _ = self.optimal_cost(self.root)  # fill policy
-        def H(S):
-            n = bitcount(S)
-            return 0.0 if n <= 1 else math.log2(n)
-
-        dist = {self.root: 1.0}
-        turns, E_n, E_H, leaf_mass = [], [], [], []
-        t = 0
-        while True:
-            turns.append(t)
-            E_n.append(sum(p*bitcount(S) for S, p in dist.items()))
-            E_H.append(sum(p*H(S) for S, p in dist.items()))
-            leaf_mass.append(sum(p for S, p in dist.items() if self._is_leaf(S)))
-            if leaf_mass[-1] >= 1.0 - 1e-12:
-                break
-            next_dist = {}
-            for S, pS in dist.items():
-                n = bitcount(S)
-                if self._is_leaf(S):
-                    next_dist[S] = next_dist.get(S, 0.0) + pS
-                    continue
-                a = self._best_attr.get(S, "")
-                if not a:
-                    next_dist[S] = next_dist.get(S, 0.0) + pS
-                    continue
-                parts = self._children(S, a)
-                for child in parts:
-                    w = pS * (bitcount(child)/n)
-                    next_dist[child] = next_dist.get(child, 0.0) + w
-            dist = next_dist
-            t += 1
-        return {"turn": turns, "E_candidates": E_n, "E_entropy_bits": E_H, "leaf_mass": leaf_mass}
+        """Return dict with lists: turn, E_candidates, E_entropy_bits, leaf_mass (+ depth_pmf)."""
+        _ = self.solve(self.root)  # fill policy
+        prof = self.state_profile(self.root)
+        return {"turn": list(range(len(prof["E_candidates"]))), **prof}
 
 def main():
     ap = argparse.ArgumentParser(description="k-ary oracle with per-turn curves")
-    ap.add_argument("--dataset", required=True, help="JSON mapping id -> {attr: value}")
+    ap.add_argument("--dataset", required=True,
+                    help="JSON mapping id -> {attr: value}, or a compiled .oqabin file")
+    ap.add_argument("--save_tree", default=None,
+                    help="Optional path for the optimal tree: JSON, or binary if it ends in .oqatree")
     ap.add_argument("--curve_csv", default=None, help="CSV path to save per-turn expectations")
+    ap.add_argument("--engine", choices=ENGINES, default="recursive",
+                    help="DP engine: recursive, iterative (explicit stack, no recursion limit) "
+                         "or numpy (batched partitions, needs numpy)")
+    ap.add_argument("--memo_max_entries", type=int, default=None,
+                    help="Cap on memoized states; eviction drops the smallest states among the least recently used half")
+    ap.add_argument("--memo_db", default=None,
+                    help="SQLite file that persists the memo per dataset fingerprint (warm start / resume)")
+    ap.add_argument("--memo_compact", action="store_true",
+                    help="Keep the memo in packed NumPy arrays (oqa_memo_compact): less memory, slower lookups")
+    ap.add_argument("--partition_cache_max", type=int, default=1 << 16,
+                    help="Cap on cached per-state splits reused by tree/curve construction")
+    ap.add_argument("--canonical", action="store_true",
+                    help="Share memo entries between isomorphic states (value relabelling, attribute "
+                         "permutation). Trades a large slowdown (8-20x, e.g. 100_Places 0.23s -> 5s) "
+                         "for a smaller memo; only use it when memory is the limit")
+    ap.add_argument("--canonical_max_size", type=int, default=8,
+                    help="Largest state (in objects) keyed by canonical signature")
+    ap.add_argument("--bnb", action="store_true",
+                    help="Branch-and-bound with Huffman/entropy lower bounds (same optimum); "
+                         "much faster when the bounds prune well (100_Cars), but can be slower "
+                         "on datasets without much duplication")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Solve the root's child subtrees in N worker processes")
+    ap.add_argument("--weights", default=None,
+                    help="Prior sidecar: JSON {id: weight} or CSV id,weight (default: uniform)")
+    ap.add_argument("--profile", default=None,
+                    help="Write solve instrumentation (states, memo hits, time per popcount) to this JSON")
+    ap.add_argument("--progress_every", type=float, default=5.0,
+                    help="Seconds between --profile progress lines on stderr (0 = off)")
+    ap.add_argument("--pstats", default=None, help="Also dump a cProfile of the solve to this path")
     args = ap.parse_args()
+    if args.bnb and args.engine != "recursive":
+        ap.error("--bnb requires --engine recursive")
+    if args.weights and (args.bnb or args.canonical):
+        ap.error("--weights cannot be combined with --bnb or --canonical")
+    if args.memo_compact and (args.canonical or args.memo_db):
+        ap.error("--memo_compact cannot be combined with --canonical or --memo_db")
 
-    with open(args.dataset, "r") as f:
-        objects = json.load(f)
+    if args.dataset.endswith(".oqabin"):
+        from oqa_dataset_bin import CompiledDataset
+        objects = CompiledDataset(args.dataset)
+    else:
+        with open(args.dataset, "r") as f:
+            objects = json.load(f)
 
-    eng = KaryOracleDP(objects)
-    opt = eng.optimal_cost(eng.root)
+    if args.memo_db:
+        from oqa_memo_store import PersistentMemo
+        memo = PersistentMemo(args.memo_db, max_entries=args.memo_max_entries)
+    elif args.memo_compact:
+        from oqa_memo_compact import CompactMemo
+        memo = CompactMemo(max_entries=args.memo_max_entries)
+    else:
+        memo = StateMemo(max_entries=args.memo_max_entries)
+    eng = KaryOracleDP(objects, memo=memo, partitions=PartitionCache(args.partition_cache_max),
+                       bnb=args.bnb, engine=args.engine, canonical=args.canonical,
+                       canonical_max_size=args.canonical_max_size,
+                       weights=load_weights(args.weights) if args.weights else None)
+    if args.memo_db:
+        print(f"Memo store: {memo.loaded} states loaded from {args.memo_db}")
+    profiler = cprof = None
+    if args.profile:
+        from oqa_profile import SolveProfiler
+        profiler = SolveProfiler(eng, progress_every=args.progress_every or None).attach()
+    if args.pstats:
+        import cProfile
+        cprof = cProfile.Profile()
+        cprof.enable()
+    try:
+        if args.workers > 1:
+            from oqa_kary_parallel import solve_parallel
+            opt = solve_parallel(eng, args.workers)
+        else:
+            opt = eng.solve()
+    finally:
+        if cprof is not None:
+            cprof.disable()
+            cprof.dump_stats(args.pstats)
+        if profiler is not None:
+            profiler.detach()
+        # Keep whatever was solved, even if interrupted
+        if args.memo_db:
+            memo.flush()
     print(f"Objects: {eng.n}, Attributes: {len(eng.attrs)}")
-    print(f"Optimal expected number of queries (uniform prior): {opt:.6f}")
+    prior = "weighted prior" if args.weights else "uniform prior"
+    print(f"Optimal expected number of queries ({prior}): {opt:.6f}")
+    st = eng.memo.stats()
+    print(f"Memo: {st['size']} states, {st['hits']} hits, {st['misses']} misses, {st['evictions']} evicted")
+    if args.bnb:
+        print(f"Branch-and-bound: {eng.pruned} child states pruned")
+    if profiler is not None:
+        # Worker processes are not instrumented; only the parent's share is counted
+        rep = profiler.write(args.profile, dataset=args.dataset, optimal_cost=opt,
+                             workers=args.workers, pstats=args.pstats)
+        print(f"Profile: {rep['states_expanded']} states expanded, "
+              f"{rep['partitions_evaluated']} partitions in {rep['seconds']:.2f}s -> {args.profile}")
+
+    if args.save_tree:
+        # Streamed node by node; .oqatree gets the compact binary format
+        from oqa_tree_io import EXT, write_tree_bin, write_tree_json
+        if args.save_tree.endswith(EXT):
+            write_tree_bin(eng, args.save_tree)
+        else:
+            with open(args.save_tree, "w") as f:
+                write_tree_json(eng, f)
+        print(f"Saved optimal tree to: {args.save_tree}")
 
     curve = eng.expected_curve()
+    hist = ", ".join(f"{t}:{p:.4f}" for t, p in enumerate(curve["depth_pmf"]) if p > 0)
+    print(f"Depth distribution (questions: probability): {hist}")
     if args.curve_csv:
         import csv
         with open(args.curve_csv, "w", newline="") as f:
@@ -124,6 +834,8 @@ def main():
             w.writerow(["turn","E_candidates","E_entropy_bits","leaf_mass"])
             for t, n, h, m in zip(curve["turn"], curve["E_candidates"], curve["E_entropy_bits"], curve["leaf_mass"]):
                 w.writerow([t, f"{n:.6f}", f"{h:.6f}", f"{m:.6f}"])
+    if args.memo_db:
+        memo.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# Process-pool solve of the root's independent child subtrees for KaryOracleDP.
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from oqa_kary_oracle_dp import KaryOracleDP, StateMemo, bitcount
+
+# Per-worker oracle, built once by the pool initializer
+_WORKER: Optional[KaryOracleDP] = None
+_EXPORTED: Set[Any] = set()
+
+def _init_worker(objects: Dict[str, Dict[str, str]], options: Dict[str, Any],
+                 max_entries: Optional[int]) -> None:
+    global _WORKER, _EXPORTED
+    _WORKER = KaryOracleDP(objects, memo=StateMemo(max_entries=max_entries), **options)
+    _EXPORTED = set()
+
+def _solve_subtree(S: int) -> Tuple[int, float, List[Tuple[Any, float, Any]], int]:
+    """Solve one subtree; return memo entries this worker has not shipped before."""
+    pruned0 = _WORKER.pruned
+    cost = _WORKER.solve(S)
+    new = [(k, e[0], e[1]) for k, e in _WORKER.memo.items() if k not in _EXPORTED]
+    _EXPORTED.update(k for k, _, _ in new)
+    return S, cost, new, _WORKER.pruned - pruned0
+
+def root_subtasks(oracle: KaryOracleDP, S: int) -> List[int]:
+    """Distinct unsolved children of S over every splitting attribute, largest first."""
+    tasks = set()
+    for a in oracle.attrs:
+        parts = oracle._children(S, a)
+        if len(parts) <= 1:
+            continue
+        for child in parts:
+            if bitcount(child) > 1 and child not in tasks and oracle._lookup(child) is None:
+                tasks.add(child)
+    return sorted(tasks, key=lambda m: (-bitcount(m), m))
+
+def solve_parallel(oracle: KaryOracleDP, workers: int, S: Optional[int] = None) -> float:
+    """
+    Fan the child subproblems of S (every attribute x value) out to a process pool,
+    merge the returned costs and policies into oracle.memo, then score S itself.
+    Each state is solved by the same code as the serial run, so cost and policy
+    are identical.  Subtrees shared between tasks may be solved by more than one
+    worker; the first copy merged wins.
+    """
+    if S is None:
+        S = oracle.root
+    if bitcount(S) <= 1:
+        return 0.0
+    tasks = root_subtasks(oracle, S)
+    if tasks and workers > 1:
+        init = (oracle.objects, oracle.options(), oracle.memo.max_entries)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init) as ex:
+            for _, _, entries, pruned in ex.map(_solve_subtree, tasks):
+                oracle.pruned += pruned
+                for key, cost, attr in entries:
+                    if key not in oracle.memo:
+                        oracle.memo.put(key, cost, attr)
+    # Every child is memoized now, so this only scores S
+    return oracle.optimal_cost(S)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# Memo table shared by the subset DPs: KaryOracleDP, BooleanOracleDP and the k-ary tier scripts.
+
+import heapq, itertools
+from typing import Any, Dict, Optional, Tuple
+
+def _state_size(key) -> int:
+    # Memo keys are masks or canonical signatures (one row per object)
+    return key.bit_count() if isinstance(key, int) else len(key)
+
+class StateMemo:
+    """
+    Memo table for the subset DP, keyed by candidate bitmask -> (cost, best_attr).
+    In canonical mode small states are keyed by signature, with a column index as best_attr.
+    Several oracles over the same dataset may share one memo (checked by fingerprint).
+    With max_entries set, hits refresh recency and eviction drops the smallest
+    states among the least recently used half.  A cap far below the number of
+    reachable states still re-solves subtrees; size it near len(memo) of an
+    uncapped run.
+    """
+    def __init__(self, max_entries: Optional[int] = None, evict_fraction: float = 0.25):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.evict_fraction = evict_fraction
+        self.fingerprint: Optional[str] = None
+        self._table: Dict[int, Tuple[float, str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __contains__(self, S: int) -> bool:
+        return S in self._table
+
+    def bind(self, fingerprint: str) -> None:
+        """Attach to a dataset; refuse to mix states from different datasets."""
+        if self.fingerprint is None:
+            self.fingerprint = fingerprint
+        elif self.fingerprint != fingerprint:
+            raise ValueError("StateMemo is already bound to a different dataset")
+
+    def get(self, S: int) -> Optional[Tuple[float, str]]:
+        entry = self._table.get(S)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            if self.max_entries is not None:
+                # Dicts keep insertion order: re-inserting marks S as most recently used
+                del self._table[S]
+                self._table[S] = entry
+        return entry
+
+    def put(self, S: int, cost: float, attr: str) -> None:
+        self._table[S] = (cost, attr)
+        if self.max_entries is not None and len(self._table) > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        # Drop a batch (amortizing the scan): the smallest of the least recently used half
+        k = max(1, int(self.max_entries * self.evict_fraction))
+        old = itertools.islice(self._table, max(k, len(self._table) // 2))
+        for S in heapq.nsmallest(k, old, key=_state_size):
+            del self._table[S]
+        self.evictions += k
+
+    def clear(self) -> None:
+        self._table.clear()
+
+    def items(self):
+        """(key, (cost, best_attr)) pairs, without touching hit/miss counters."""
+        return self._table.items()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._table),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "max_entries": self.max_entries,
+        }
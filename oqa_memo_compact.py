@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# Array-backed StateMemo: open addressing over fixed-width packed masks in NumPy arrays.
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from oqa_memo import StateMemo
+
+_GOLDEN = 0x9E3779B97F4A7C15
+_U64 = (1 << 64) - 1
+
+class CompactMemo(StateMemo):
+    """
+    StateMemo with the same get/put/items/stats interface, stored in parallel
+    arrays instead of a dict of boxed ints, floats and tuples:
+      keys   (capacity, words) uint64, the mask little-endian
+      tags   (capacity,) uint64 hash(mask) + 1, 0 = empty slot
+      costs  (capacity,) float64 (or float32 via cost_dtype, to halve that column)
+      attrs  (capacity,) uint8 code into a small table of attribute names
+      stamps (capacity,) uint32 logical time of the last put or hit
+    Lookups hash the mask (Fibonacci hashing) and probe linearly, comparing tags
+    first and raw key bytes on a tag match.  The table doubles past max_load and
+    widens when a longer mask arrives.  With max_entries set, eviction drops the
+    lowest-popcount states among the least recently used half, as in StateMemo.
+    Only mask keys are supported, so
+    canonical mode needs StateMemo.
+    """
+    def __init__(self, max_entries: Optional[int] = None, evict_fraction: float = 0.25,
+                 capacity: int = 1 << 12, words: int = 1, cost_dtype=np.float64, max_load: float = 0.85):
+        super().__init__(max_entries=max_entries, evict_fraction=evict_fraction)
+        self.cost_dtype = np.dtype(cost_dtype)
+        self.max_load = max_load
+        self._names: List[str] = [""]
+        self._codes: Dict[str, int] = {"": 0}
+        self._count = 0
+        self._clock = 0
+        self._alloc(max(8, 1 << (capacity - 1).bit_length()), words)
+
+    def _alloc(self, capacity: int, words: int) -> None:
+        self._cap = capacity
+        self._words = words
+        self._width = 8 * words
+        self._shift = 64 - (capacity.bit_length() - 1)
+        self._keys = np.zeros((capacity, words), dtype=np.uint64)
+        self._tags = np.zeros(capacity, dtype=np.uint64)
+        self._costs = np.zeros(capacity, dtype=self.cost_dtype)
+        self._attrs = np.zeros(capacity, dtype=np.uint8)
+        self._stamps = np.zeros(capacity, dtype=np.uint32)
+        # Scalar reads/writes go through memoryviews: plain floats/ints, no NumPy scalars
+        self._kv = memoryview(self._keys).cast("B")
+        self._tv = memoryview(self._tags)
+        self._cv = memoryview(self._costs)
+        self._av = memoryview(self._attrs)
+        self._sv = memoryview(self._stamps)
+
+    def _probe(self, S: int, tag: int) -> Tuple[int, bool]:
+        # (slot, found): the slot holding S, or the empty slot where it would go.
+        # Tags (hash + 1, never 0) screen slots; key bytes are compared on a tag match only
+        tv, w, last = self._tv, self._width, self._cap - 1
+        i = ((tag * _GOLDEN) & _U64) >> self._shift
+        key = None
+        while True:
+            t = tv[i]
+            if t == 0:
+                return i, False
+            if t == tag:
+                if key is None:
+                    key = S.to_bytes(w, "little")
+                if self._kv[i * w:(i + 1) * w] == key:
+                    return i, True
+            i = (i + 1) & last
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, S: int) -> bool:
+        if not isinstance(S, int) or S <= 0 or S.bit_length() > 64 * self._words:
+            return False
+        return self._probe(S, hash(S) + 1)[1]
+
+    def get(self, S: int) -> Optional[Tuple[float, str]]:
+        if S.bit_length() <= 64 * self._words:
+            i, found = self._probe(S, hash(S) + 1)
+            if found:
+                self.hits += 1
+                if self.max_entries is not None:
+                    self._sv[i] = self._tick()
+                return self._cv[i], self._names[self._av[i]]
+        self.misses += 1
+        return None
+
+    def put(self, S: int, cost: float, attr: str) -> None:
+        if not isinstance(S, int) or S <= 0:
+            raise TypeError("CompactMemo stores positive bitmask keys only (no canonical signatures)")
+        code = self._codes.get(attr)
+        if code is None:
+            if len(self._names) > 255:
+                raise ValueError("CompactMemo holds at most 255 distinct attributes")
+            code = self._codes[attr] = len(self._names)
+            self._names.append(attr)
+        if S.bit_length() > 64 * self._words:
+            self._rebuild(self._cap, -(-S.bit_length() // 64))
+        tag = hash(S) + 1
+        i, found = self._probe(S, tag)
+        if not found:
+            self._kv[i * self._width:(i + 1) * self._width] = S.to_bytes(self._width, "little")
+            self._tv[i] = tag
+            self._count += 1
+        self._cv[i] = cost
+        self._av[i] = code
+        self._sv[i] = self._tick()
+        if self._count > self.max_load * self._cap:
+            self._rebuild(2 * self._cap, self._words)
+        if self.max_entries is not None and self._count > self.max_entries:
+            self._evict()
+
+    def _tick(self) -> int:
+        self._clock += 1
+        if self._clock > 0xFFFFFFFF:
+            # Renumber stamps by rank so the clock fits in uint32 again (rare)
+            slots = self._occupied()
+            order = np.argsort(self._stamps[slots], kind="stable")
+            self._stamps[slots[order]] = np.arange(1, len(slots) + 1, dtype=np.uint32)
+            self._clock = len(slots) + 1
+        return self._clock
+
+    def _occupied(self) -> np.ndarray:
+        return np.flatnonzero(self._tags)
+
+    def _rebuild(self, capacity: int, words: int, keep: Optional[np.ndarray] = None) -> None:
+        # Move the surviving entries into fresh arrays; stored tags spare rehashing the keys
+        slots = self._occupied() if keep is None else keep
+        keys, tags = self._keys[slots], self._tags[slots]
+        costs, attrs, stamps = self._costs[slots], self._attrs[slots], self._stamps[slots]
+        self._alloc(capacity, words)
+        tv, last = self._tv, capacity - 1
+        dest = []
+        for tag in tags.tolist():
+            i = ((tag * _GOLDEN) & _U64) >> self._shift
+            while tv[i]:
+                i = (i + 1) & last
+            tv[i] = tag
+            dest.append(i)
+        self._keys[dest, :keys.shape[1]] = keys
+        self._costs[dest] = costs
+        self._attrs[dest] = attrs
+        self._stamps[dest] = stamps
+        self._count = len(dest)
+
+    def _evict(self) -> None:
+        # Drop a batch (amortizing the scan): the smallest of the least recently used half
+        k = max(1, int(self.max_entries * self.evict_fraction))
+        slots = self._occupied()
+        old = slots[np.argsort(self._stamps[slots], kind="stable")[:max(k, len(slots) // 2)]]
+        pop = np.bitwise_count(self._keys[old]).sum(axis=1)
+        drop = old[np.argsort(pop, kind="stable")[:k]]
+        self._rebuild(self._cap, self._words, keep=np.setdiff1d(slots, drop))
+        self.evictions += len(drop)
+
+    def clear(self) -> None:
+        self._alloc(self._cap, self._words)
+        self._count = 0
+
+    def items(self) -> Iterator[Tuple[int, Tuple[float, str]]]:
+        """(mask, (cost, best_attr)) pairs, without touching hit/miss counters."""
+        w = self._width
+        for i in self._occupied().tolist():
+            yield (int.from_bytes(self._kv[i * w:(i + 1) * w], "little"),
+                   (self._cv[i], self._names[self._av[i]]))
+
+    @property
+    def nbytes(self) -> int:
+        return (self._keys.nbytes + self._tags.nbytes + self._costs.nbytes + self._attrs.nbytes
+                + self._stamps.nbytes)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"size": self._count, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions, "max_entries": self.max_entries,
+                "capacity": self._cap, "bytes": self.nbytes}
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# SQLite-backed StateMemo: warm starts and resumable solves keyed by dataset fingerprint.
+
+import json, sqlite3
+from typing import Any, List, Optional, Tuple
+
+from oqa_memo import StateMemo, _state_size
+
+def encode_key(key) -> str:
+    # Masks are stored as hex, canonical signatures as JSON rows
+    if isinstance(key, int):
+        return "m:" + format(key, "x")
+    return "s:" + json.dumps(key, separators=(",", ":"))
+
+def decode_key(text: str):
+    if text.startswith("m:"):
+        return int(text[2:], 16)
+    return tuple(tuple(r) for r in json.loads(text[2:]))
+
+class PersistentMemo(StateMemo):
+    """
+    StateMemo whose entries are checkpointed to an SQLite file.
+    Entries live in memory as usual; every `checkpoint_every` new states are
+    committed to disk, so an interrupted solve resumes from its last checkpoint.
+    bind() loads the stored entries for the dataset fingerprint (largest states
+    first when max_entries caps the table), so a later run starts warm.
+    """
+    def __init__(self, path: str, max_entries: Optional[int] = None,
+                 evict_fraction: float = 0.25, checkpoint_every: int = 10000):
+        super().__init__(max_entries=max_entries, evict_fraction=evict_fraction)
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.loaded = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: List[Tuple[str, str, int, float, str]] = []
+
+    def bind(self, fingerprint: str) -> None:
+        super().bind(fingerprint)
+        if self._conn is not None:
+            return
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS memo ("
+            " fingerprint TEXT NOT NULL, key TEXT NOT NULL, size INTEGER NOT NULL,"
+            " cost REAL NOT NULL, attr TEXT NOT NULL,"
+            " PRIMARY KEY (fingerprint, key))")
+        q = "SELECT key, cost, attr FROM memo WHERE fingerprint = ? ORDER BY size DESC"
+        params: Tuple[Any, ...] = (fingerprint,)
+        if self.max_entries is not None:
+            q += " LIMIT ?"
+            params += (self.max_entries,)
+        for key, cost, attr in self._conn.execute(q, params):
+            self._table[decode_key(key)] = (cost, json.loads(attr))
+        self.loaded = len(self._table)
+
+    def put(self, S, cost: float, attr) -> None:
+        if self._conn is not None and S not in self._table:
+            self._pending.append((self.fingerprint, encode_key(S), _state_size(S),
+                                  cost, json.dumps(attr)))
+            if len(self._pending) >= self.checkpoint_every:
+                self.flush()
+        super().put(S, cost, attr)
+
+    def flush(self) -> None:
+        """Commit pending entries to disk."""
+        if self._conn is None or not self._pending:
+            return
+        self._conn.executemany("INSERT OR IGNORE INTO memo VALUES (?, ?, ?, ?, ?)", self._pending)
+        self._conn.commit()
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def stats(self):
+        st = super().stats()
+        st["loaded"] = self.loaded
+        return st
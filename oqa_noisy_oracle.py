@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# Noisy-answer oracle: answers pass through a per-attribute confusion matrix, so the state is
+# a posterior over candidates.  Finite-horizon DP over sparse beliefs, cached by quantized belief.
+# Usage: python oqa_noisy_oracle.py --dataset 25_Animals.json --flip 0.05 [--noise noise.json]
+#                                   [--horizon 6] [--confidence 0.95] [--curve_csv noisy_curve.csv]
+#
+# Noise sidecar (JSON, per attribute; "*" sets the default for unlisted attributes):
+#   {"*": 0.05,                                  symmetric flip: wrong answers share eps evenly
+#    "color": [[0.9, 0.1, 0.0], ...],            confusion matrix, rows/cols in sorted value order
+#    "size": {"small": {"small": 0.8, "medium": 0.2}, ...}}   true value -> {answer: prob}
+# The curve CSV has expected_curve's columns (E_candidates is the expected perplexity 2^H,
+# which is |S| for noiseless answers) plus E_top_posterior, the chance the MAP guess is right.
+
+import argparse, csv, json, time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from oqa_kary_oracle_dp import KaryOracleDP, load_weights
+from oqa_kary_numpy import KaryNumpyBackend
+
+# A belief is (candidate indices, posterior probabilities), ascending indices, p > 0, sum 1
+Belief = Tuple[np.ndarray, np.ndarray]
+
+OBJECTIVES = ("questions", "entropy")
+
+def symmetric_confusion(k: int, flip: float) -> np.ndarray:
+    """k x k matrix: the true value with prob 1 - flip, each other value flip / (k - 1)."""
+    if k == 1:
+        return np.ones((1, 1))
+    if not 0.0 <= flip < 1.0:
+        raise ValueError(f"flip probability must be in [0, 1), got {flip}")
+    C = np.full((k, k), flip / (k - 1))
+    np.fill_diagonal(C, 1.0 - flip)
+    return C
+
+def load_noise(path: str) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return json.load(f)
+
+class NoiseModel:
+    """
+    Per-attribute confusion matrices: C[j][v, y] = P(answer y | true value v) for
+    attribute oracle.attrs[j], value indices in oracle.attr_vals order.  spec maps
+    attribute names (or "*") to a flip probability, a matrix or nested dicts; anything
+    unlisted gets a symmetric flip of `flip`.
+    """
+    def __init__(self, oracle: KaryOracleDP, spec: Optional[Dict[str, Any]] = None, flip: float = 0.0):
+        spec = dict(spec or {})
+        default = spec.pop("*", flip)
+        unknown = sorted(set(spec) - set(oracle.attrs))
+        if unknown:
+            raise ValueError(f"noise model names unknown attributes: {unknown}")
+        self.C: List[np.ndarray] = []
+        for a in oracle.attrs:
+            vals = oracle.attr_vals[a]
+            s = spec.get(a, default)
+            if isinstance(s, (int, float)):
+                C = symmetric_confusion(len(vals), float(s))
+            elif isinstance(s, dict):
+                # JSON keys are strings, so match values by their json.dumps/str spellings too
+                pos = {}
+                for k, v in enumerate(vals):
+                    pos[json.dumps(v)] = pos[str(v)] = k
+                pos.update({v: k for k, v in enumerate(vals)})
+                C = np.zeros((len(vals), len(vals)))
+                for v, row in s.items():
+                    for y, p in row.items():
+                        if v not in pos or y not in pos:
+                            raise ValueError(f"noise for {a}: unknown value {v if v not in pos else y!r}")
+                        C[pos[v], pos[y]] = p
+            else:
+                C = np.asarray(s, dtype=np.float64)
+                if C.shape != (len(vals), len(vals)):
+                    raise ValueError(f"noise for {a}: expected a {len(vals)}x{len(vals)} matrix")
+            if (C < 0).any() or not np.allclose(C.sum(axis=1), 1.0, atol=1e-6):
+                raise ValueError(f"noise for {a}: rows must be probability distributions")
+            self.C.append(C)
+
+class NoisyOracleDP:
+    """
+    Belief-state DP for noisy answers.  Asking attribute j when the belief is b gives
+    answer y with P(y) = sum_i b_i C[j][v_i, y], and the posterior b_y(i) ~ b_i C[j][v_i, y].
+    A dialog stops once the top posterior reaches `confidence`, after `horizon` questions,
+    or when no attribute's answer distribution differs across the candidates.
+    objective "questions": minimize the expected number of questions asked (so with flip 0,
+      confidence 1 and a long enough horizon this is KaryOracleDP's optimum);
+    objective "entropy": minimize the expected posterior entropy (bits) at the stop.
+    Beliefs are sparse: posteriors below `prune` are dropped and the rest renormalized
+    (the top candidate is always kept, so a belief never empties).
+    Values are cached by (turns left, support, posterior rounded to 1/quant), so nearby
+    beliefs share an entry; max_actions keeps only the most informative questions per state.
+    Ties (within 1e-12) go to the first attribute, the rule documented on KaryOracleDP.
+    """
+    def __init__(self, oracle: KaryOracleDP, noise: Optional[NoiseModel] = None, horizon: int = 6,
+                 confidence: float = 0.95, objective: str = "questions", prune: float = 1e-4,
+                 quant: int = 256, max_actions: Optional[int] = None):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"objective must be one of {OBJECTIVES}")
+        self.oracle = oracle
+        self.noise = noise if noise is not None else NoiseModel(oracle)
+        be = KaryNumpyBackend(oracle)
+        self.codes = be.codes
+        # Confusion matrices zero-padded to kmax x kmax, stacked by attribute index
+        self._C = np.zeros((be.d, be.kmax, be.kmax))
+        for j, C in enumerate(self.noise.C):
+            self._C[j, :len(C), :len(C)] = C
+        self._cols = np.arange(be.d)
+        self.horizon = horizon
+        self.confidence = confidence
+        self.objective = objective
+        self.prune = prune
+        self.quant = quant
+        self.max_actions = max_actions
+        self.cache: Dict[bytes, Tuple[float, int]] = {}
+        self.hits = 0
+        self.updates = 0
+
+    def root_belief(self) -> Belief:
+        o = self.oracle
+        p = np.full(o.n, 1.0 / o.n) if o.weights is None else np.asarray(o.weights, dtype=np.float64)
+        idx = np.flatnonzero(p > 0)
+        return idx, p[idx] / p[idx].sum()
+
+    @staticmethod
+    def entropy(b: Belief) -> float:
+        p = b[1]
+        return float(-(p * np.log2(p)).sum())
+
+    def _batch(self, b: Belief, attrs: Optional[List[int]] = None):
+        # All attributes updated at once over the padded matrices: (m, attrs, kmax) posteriors
+        idx, p = b
+        cols = self._cols if attrs is None else np.asarray(attrs, dtype=np.int64)
+        L = self._C[cols[None, :], self.codes[np.ix_(idx, cols)]]
+        split = (L != L[0]).any(axis=(0, 2)) if attrs is None else np.ones(len(cols), dtype=bool)
+        joint = p[:, None, None] * L
+        py = joint.sum(axis=0)
+        live = py > 1e-12
+        post = joint / np.where(live, py, 1.0)
+        return cols, split, py, live, post, (post > self.prune) | (post == post.max(axis=0))
+
+    def _child_entropy(self, py: np.ndarray, post: np.ndarray, keep: np.ndarray) -> np.ndarray:
+        # Expected entropy of the pruned, renormalized posteriors, per attribute
+        q = np.where(keep, post, 0.0)
+        q = q / np.maximum(q.sum(axis=0), 1e-300)
+        h = -(q * np.log2(np.where(q > 0, q, 1.0))).sum(axis=0)
+        return (py * h).sum(axis=1)
+
+    def expand(self, b: Belief, attrs: Optional[List[int]] = None) -> List[Tuple[int, List[Tuple[int, float, Belief]]]]:
+        """
+        (attribute index, [(answer index, probability, posterior), ...]) for every
+        attribute whose answer distribution differs across the candidates of b (or for
+        the given attrs).
+        """
+        idx = b[0]
+        cols, split, py, live, post, keep = self._batch(b, attrs)
+        full = keep.all(axis=0)
+        out = []
+        for c in np.flatnonzero(split).tolist():
+            ans = []
+            for y in np.flatnonzero(live[c]).tolist():
+                if full[c, y]:
+                    child = (idx, post[:, c, y].copy())
+                else:
+                    k = keep[:, c, y]
+                    q = post[k, c, y]
+                    child = (idx[k], q / q.sum())
+                ans.append((y, float(py[c, y]), child))
+            self.updates += len(ans)
+            out.append((int(cols[c]), ans))
+        return out
+
+    def _beam(self, cand: np.ndarray, ent: np.ndarray) -> np.ndarray:
+        # The max_actions candidates with the lowest expected posterior entropy, in attribute order
+        if self.max_actions is None or len(cand) <= self.max_actions:
+            return cand
+        return np.sort(cand[np.argsort(ent, kind="stable")[:self.max_actions]])
+
+    def _last_question(self, b: Belief) -> Tuple[float, int]:
+        # One question left: every answer ends the dialog, so score all attributes in one batch
+        cols, split, py, _, post, keep = self._batch(b)
+        cand = np.flatnonzero(split)
+        if not len(cand):
+            return self._terminal(b), -1
+        ent = self._child_entropy(py[cand], post[:, cand], keep[:, cand])
+        pick = self._beam(np.arange(len(cand)), ent)
+        if self.objective == "questions":
+            return 1.0, int(cols[cand[pick[0]]])
+        k = pick[np.argmin(ent[pick])]
+        return float(ent[k]), int(cols[cand[k]])
+
+    def answers(self, b: Belief, j: int) -> List[Tuple[int, float, Belief]]:
+        """(answer index, probability, posterior) for every answer to attribute j with P > 0."""
+        return self.expand(b, [j])[0][1]
+
+    def _key(self, b: Belief, h: int) -> bytes:
+        q = np.rint(b[1] * self.quant).astype(np.uint32)
+        return h.to_bytes(2, "little") + b[0].astype(np.int32).tobytes() + q.tobytes()
+
+    def _terminal(self, b: Belief) -> float:
+        return self.entropy(b) if self.objective == "entropy" else 0.0
+
+    def value(self, b: Belief, h: Optional[int] = None) -> Tuple[float, int]:
+        """(expected cost, attribute index or -1 to stop) with h questions left."""
+        if h is None:
+            h = self.horizon
+        if h <= 0 or b[1].max() >= self.confidence - 1e-12:
+            return self._terminal(b), -1
+        key = self._key(b, h)
+        hit = self.cache.get(key)
+        if hit is not None:
+            self.hits += 1
+            return hit
+        if h == 1:
+            self.cache[key] = self._last_question(b)
+            return self.cache[key]
+        actions = self.expand(b)
+        if self.max_actions is not None and len(actions) > self.max_actions:
+            gain = np.array([sum(py * self.entropy(c) for _, py, c in ans) for _, ans in actions])
+            actions = [actions[k] for k in self._beam(np.arange(len(actions)), gain).tolist()]
+        best, best_j = self._terminal(b), -1
+        step = 1.0 if self.objective == "questions" else 0.0
+        for k, (j, ans) in enumerate(actions):
+            cand = step + sum(py * self.value(c, h - 1)[0] for _, py, c in ans)
+            # Costs differ from KaryOracleDP's in the last bits; a tolerance keeps its tie-breaks
+            if k == 0 or cand < best - 1e-12:
+                best, best_j = cand, j
+        self.cache[key] = (best, best_j)
+        return best, best_j
+
+    def solve(self) -> float:
+        return self.value(self.root_belief())[0]
+
+    def best_attr(self, b: Belief, h: Optional[int] = None) -> str:
+        j = self.value(b, h)[1]
+        return self.oracle.attrs[j] if j >= 0 else ""
+
+    def expected_curve(self) -> Dict[str, List[float]]:
+        """
+        Per-turn expectations over answers under the planned policy: perplexity 2^H,
+        entropy, mass of stopped dialogs and top posterior.  Beliefs sharing a cache
+        key are merged, so the frontier stays as small as the cache.
+        """
+        frontier: Dict[bytes, Tuple[Belief, float]] = {}
+        b0 = self.root_belief()
+        frontier[self._key(b0, self.horizon)] = (b0, 1.0)
+        curve: Dict[str, List[float]] = {"turn": [], "E_candidates": [], "E_entropy_bits": [],
+                                         "leaf_mass": [], "E_top_posterior": []}
+        for t in range(self.horizon + 1):
+            h = self.horizon - t
+            moves = [(b, w, self.value(b, h)[1]) for b, w in frontier.values()]
+            ent = [self.entropy(b) for b, _, _ in moves]
+            curve["turn"].append(t)
+            curve["E_candidates"].append(sum(w * 2.0 ** e for (_, w, _), e in zip(moves, ent)))
+            curve["E_entropy_bits"].append(sum(w * e for (_, w, _), e in zip(moves, ent)))
+            curve["leaf_mass"].append(sum(w for _, w, j in moves if j < 0))
+            curve["E_top_posterior"].append(sum(w * float(b[1].max()) for b, w, _ in moves))
+            if curve["leaf_mass"][-1] >= 1.0 - 1e-12:
+                break
+            nxt: Dict[bytes, Tuple[Belief, float]] = {}
+            for b, w, j in moves:
+                kids = [(w, b)] if j < 0 else [(w * py, c) for _, py, c in self.answers(b, j)]
+                for wc, c in kids:
+                    key = self._key(c, h - 1)
+                    prev = nxt.get(key)
+                    nxt[key] = (c, wc) if prev is None else (prev[0], prev[1] + wc)
+            frontier = nxt
+        return curve
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cached_beliefs": len(self.cache), "cache_hits": self.hits, "posterior_updates": self.updates}
+
+def main():
+    ap = argparse.ArgumentParser(description="Noisy-answer oracle (belief-state DP)")
+    ap.add_argument("--dataset", required=True, help="JSON mapping id -> {attr: value}, or .oqabin")
+    ap.add_argument("--weights", default=None, help="Prior sidecar: JSON {id: weight} or CSV id,weight")
+    ap.add_argument("--noise", default=None, help="Noise sidecar JSON (see header)")
+    ap.add_argument("--flip", type=float, default=0.05, help="Symmetric flip probability for unlisted attributes")
+    ap.add_argument("--horizon", type=int, default=6, help="Maximum number of questions")
+    ap.add_argument("--confidence", type=float, default=0.95, help="Stop once the top posterior reaches this")
+    ap.add_argument("--objective", choices=OBJECTIVES, default="questions")
+    ap.add_argument("--prune", type=float, default=1e-4, help="Drop posteriors below this")
+    ap.add_argument("--quant", type=int, default=256, help="Cache beliefs rounded to 1/quant")
+    ap.add_argument("--max_actions", type=int, default=None, help="Only expand the N most informative questions")
+    ap.add_argument("--curve_csv", default=None, help="Optional CSV path for per-turn expectations")
+    args = ap.parse_args()
+
+    from oqa_dataset_bin import load_objects
+    oracle = KaryOracleDP(load_objects(args.dataset),
+                          weights=load_weights(args.weights) if args.weights else None)
+    noise = NoiseModel(oracle, load_noise(args.noise) if args.noise else None, flip=args.flip)
+    dp = NoisyOracleDP(oracle, noise, horizon=args.horizon, confidence=args.confidence,
+                       objective=args.objective, prune=args.prune, quant=args.quant,
+                       max_actions=args.max_actions)
+    t0 = time.time()
+    cost = dp.solve()
+    elapsed = time.time() - t0
+    label = "questions" if args.objective == "questions" else "final entropy (bits)"
+    print(f"Objects: {oracle.n}, Attributes: {len(oracle.attrs)}, horizon {args.horizon}, "
+          f"confidence {args.confidence}")
+    print(f"Expected {label}: {cost:.6f}  (first question: {dp.best_attr(dp.root_belief()) or '-'})")
+    print(f"Solve time: {elapsed:.2f}s, {dp.stats()}")
+    if args.curve_csv:
+        curve = dp.expected_curve()
+        keys = list(curve)
+        with open(args.curve_csv, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(keys)
+            for row in zip(*(curve[k] for k in keys)):
+                w.writerow([row[0]] + [f"{x:.6f}" for x in row[1:]])
+        print(f"Wrote {args.curve_csv}")
+
+if __name__ == "__main__":
+    main()
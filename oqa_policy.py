@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# Compiled policy table (.oqapol) and a next-question service over it.
+# Usage: python oqa_policy.py compile --dataset k-ary-100/oqa_kary100_dataset.json --out kary100.oqapol
+#        python oqa_policy.py serve --policy kary100.oqapol            # JSON lines on stdin/stdout
+#        python oqa_policy.py serve --policy kary100.oqapol --http 8765  # GET /next?ids=0001,0002,...
+#
+# Layout (sections aligned to 8 bytes):
+#   magic    b"OQAPOL01"
+#   uint64   header length H, then H bytes of JSON: n, ids, attrs, fingerprint, count, width
+#   bytes    count sorted masks, `width` bytes each, big-endian (bytewise order == numeric order)
+#   int16    count attribute codes (index into attrs, -1 = no question splits the state)
+#   float64  count optimal expected remaining questions
+# Every state reachable from the root by any sequence of questions is present, so any
+# candidate set a game can produce is one binary search away.  The file is opened with
+# np.memmap, so worker processes serving the same policy share its pages.
+
+import argparse, json, os, sys, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from oqa_dataset_bin import align, read_header, write_header
+from oqa_kary_oracle_dp import KaryOracleDP, bitcount, load_weights
+
+MAGIC = b"OQAPOL01"
+
+def reachable_states(oracle: KaryOracleDP, S: Optional[int] = None) -> List[int]:
+    """States with >= 2 candidates reachable from S by asking any attributes in any order."""
+    if S is None:
+        S = oracle.root
+    if bitcount(S) <= 1:
+        return []
+    seen = {S}
+    stack = [S]
+    while stack:
+        T = stack.pop()
+        for a in oracle.attrs:
+            for child in oracle._children(T, a):
+                if bitcount(child) > 1 and child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+    return list(seen)
+
+def compile_policy(oracle: KaryOracleDP, out_path: str) -> int:
+    """Solve oracle and write its policy table; returns the number of states."""
+    oracle.solve()
+    states = reachable_states(oracle)
+    width = align(max(1, (oracle.n + 7) // 8))
+    attr_idx = {a: j for j, a in enumerate(oracle.attrs)}
+    rows = []
+    for S in states:
+        entry = oracle._lookup(S)
+        if entry is None:
+            # Evicted from a capped memo: re-solve just this state
+            oracle.optimal_cost(S)
+            entry = oracle._lookup(S)
+        cost, a = entry
+        rows.append((S.to_bytes(width, "big"), attr_idx[a] if a else -1, cost))
+    rows.sort()
+    masks = np.frombuffer(b"".join(r[0] for r in rows), dtype=np.uint8)
+    codes = np.array([r[1] for r in rows], dtype=np.int16)
+    costs = np.array([r[2] for r in rows], dtype=np.float64)
+    meta = {"n": oracle.n, "ids": oracle.ids, "attrs": oracle.attrs,
+            "fingerprint": oracle.fingerprint, "count": len(rows), "width": width}
+    with open(out_path, "wb") as f:
+        pos = write_header(f, MAGIC, meta)
+        masks_at = align(pos)
+        codes_at = align(masks_at + masks.nbytes)
+        costs_at = align(codes_at + codes.nbytes)
+        f.write(b"\0" * (masks_at - pos))
+        f.write(masks.tobytes())
+        f.write(b"\0" * (codes_at - masks_at - masks.nbytes))
+        f.write(codes.tobytes())
+        f.write(b"\0" * (costs_at - codes_at - codes.nbytes))
+        f.write(costs.tobytes())
+    return len(rows)
+
+class PolicyTable:
+    """
+    Read-only, memory-mapped view of an .oqapol file.
+    lookup(mask) -> (attribute or "", expected remaining questions), or None when
+    the candidate set cannot arise from the root (e.g. an arbitrary subset);
+    ValueError for a mask with bits outside the dataset.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        meta, pos = read_header(raw, MAGIC, path, "a compiled policy")
+        self.n: int = meta["n"]
+        self.ids: List[str] = meta["ids"]
+        self.attrs: List[str] = meta["attrs"]
+        self.fingerprint: str = meta["fingerprint"]
+        self.count: int = meta["count"]
+        self.width: int = meta["width"]
+        self.id2idx = {oid: k for k, oid in enumerate(self.ids)}
+        masks_at = align(pos)
+        codes_at = align(masks_at + self.count * self.width)
+        costs_at = align(codes_at + 2 * self.count)
+        self.masks = raw[masks_at:masks_at + self.count * self.width].view(np.dtype((np.void, self.width)))
+        self.codes = raw[codes_at:codes_at + 2 * self.count].view(np.int16)
+        self.costs = raw[costs_at:costs_at + 8 * self.count].view(np.float64)
+
+    def mask_of(self, ids: Iterable[str]) -> int:
+        S = 0
+        for oid in ids:
+            S |= 1 << self.id2idx[oid]
+        return S
+
+    def lookup(self, S: int) -> Optional[Tuple[str, float]]:
+        if S < 0 or S >> self.n:
+            raise ValueError(f"mask must be a subset of the {self.n} objects")
+        if bitcount(S) <= 1:
+            return "", 0.0
+        key = np.void(S.to_bytes(self.width, "big"))
+        i = int(np.searchsorted(self.masks, key))
+        if i == self.count or self.masks[i] != key:
+            return None
+        code = int(self.codes[i])
+        return (self.attrs[code] if code >= 0 else ""), float(self.costs[i])
+
+    def answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Service reply for {"ids": [...]} or {"mask": "<hex>"}."""
+        try:
+            S = int(request["mask"], 16) if "mask" in request else self.mask_of(request["ids"])
+            hit = self.lookup(S)
+        except KeyError as e:
+            return {"error": f"unknown id or missing field: {e}"}
+        except (TypeError, ValueError, OverflowError) as e:
+            return {"error": str(e)}
+        if hit is None:
+            return {"error": "candidate set is not reachable from the full dataset"}
+        a, cost = hit
+        return {"attribute": a or None, "expected_remaining": cost, "candidates": bitcount(S)}
+
+def serve_stdio(table: PolicyTable, inp=sys.stdin, out=sys.stdout) -> None:
+    """One JSON request per input line, one JSON reply per output line."""
+    for line in inp:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            reply = table.answer(json.loads(line))
+        except json.JSONDecodeError as e:
+            reply = {"error": f"bad JSON: {e}"}
+        out.write(json.dumps(reply) + "\n")
+        out.flush()
+
+def serve_http(table: PolicyTable, port: int, host: str = "127.0.0.1") -> None:
+    """GET /next?ids=a,b,c or /next?mask=<hex>, or POST /next with a JSON body."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, reply: Dict[str, Any]) -> None:
+            body = json.dumps(reply).encode()
+            self.send_response(400 if "error" in reply else 200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/next":
+                return self._reply({"error": "use /next"})
+            q = parse_qs(url.query)
+            if "mask" in q:
+                return self._reply(table.answer({"mask": q["mask"][0]}))
+            ids = q.get("ids", [""])[0]
+            return self._reply(table.answer({"ids": [i for i in ids.split(",") if i]}))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError as e:
+                return self._reply({"error": f"bad JSON: {e}"})
+            return self._reply(table.answer(request))
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Serving {table.path} ({table.count} states) on http://{host}:{port}/next", file=sys.stderr)
+    server.serve_forever()
+
+def main():
+    ap = argparse.ArgumentParser(description="Compile the optimal policy and serve next questions")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("compile", help="Solve a dataset and write its policy table")
+    c.add_argument("--dataset", required=True, help="JSON mapping id -> {attr: value}, or .oqabin")
+    c.add_argument("--out", required=True, help="Output .oqapol path")
+    c.add_argument("--weights", default=None, help="Prior sidecar (JSON or CSV), default uniform")
+    s = sub.add_parser("serve", help="Answer 'best question for this candidate set'")
+    s.add_argument("--policy", required=True, help="Compiled .oqapol file")
+    s.add_argument("--http", type=int, default=None, help="Serve HTTP on this port instead of stdin/stdout")
+    s.add_argument("--host", default="127.0.0.1")
+    args = ap.parse_args()
+
+    if args.cmd == "compile":
+        from oqa_dataset_bin import load_objects
+        oracle = KaryOracleDP(load_objects(args.dataset),
+                              weights=load_weights(args.weights) if args.weights else None)
+        t0 = time.perf_counter()
+        count = compile_policy(oracle, args.out)
+        print(f"Wrote {args.out}: {count} states, {os.path.getsize(args.out)} bytes "
+              f"({time.perf_counter() - t0:.2f}s)")
+        return
+    table = PolicyTable(args.policy)
+    if args.http is not None:
+        serve_http(table, args.http, args.host)
+    else:
+        serve_stdio(table)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# Opt-in instrumentation for KaryOracleDP solves (oqa_kary_oracle_dp.py --profile out.json).
+# Nothing here runs unless a SolveProfiler is attached: it shadows a few oracle methods
+# on the instance and removes them again on detach, so unprofiled solves are untouched.
+
+import json, os, sys, time
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from oqa_kary_oracle_dp import KaryOracleDP, bitcount
+
+def rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError):
+        return peak_rss_mb() if resource is not None else 0.0
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (current RSS where resource is unavailable)."""
+    if resource is None:
+        return rss_mb()
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1024)
+
+class SolveProfiler:
+    """
+    Counts and times one oracle's solve:
+      - states expanded (states scored and recorded) and partitions evaluated
+        (attribute splits computed; the numpy engine scores all d per state)
+      - memo hits/misses/evictions during the profiled span
+      - seconds per popcount bucket: exclusive time in _evaluate for the
+        recursive engine, time since the previous recorded state for the
+        iterative one; the numpy engine scores buckets in bulk, so none
+    A progress line (states, states/sec, memo size, RSS) goes to `stream`
+    every `progress_every` seconds; progress_every=None turns it off.
+    """
+    def __init__(self, oracle: KaryOracleDP, progress_every: Optional[float] = 5.0, stream=sys.stderr):
+        self.oracle = oracle
+        self.progress_every = progress_every
+        self.stream = stream
+        self.states = 0
+        self.partitions = 0
+        self.count_by_pop = [0] * (oracle.n + 1)
+        self.seconds_by_pop = [0.0] * (oracle.n + 1)
+        self.timing = {"recursive": "exclusive", "iterative": "between_records"}.get(oracle.engine, "none")
+        self._child_time: List[float] = []
+        self._attached = False
+        self.seconds: Optional[float] = None  # set by detach()
+
+    def attach(self) -> "SolveProfiler":
+        o = self.oracle
+        inner_record, inner_children, inner_evaluate = o._record, o._children, o._evaluate
+        numpy_engine = o.engine == "numpy"
+        d = len(o.attrs)
+        count_by_pop, seconds_by_pop = self.count_by_pop, self.seconds_by_pop
+        between = self.timing == "between_records"
+        clock = time.perf_counter
+
+        def _record(S, cost, a):
+            self.states += 1
+            b = bitcount(S)
+            count_by_pop[b] += 1
+            if numpy_engine:
+                self.partitions += d
+            if between:
+                now = clock()
+                seconds_by_pop[b] += now - self._last
+                self._last = now
+            if self.progress_every is not None and not self.states & 255:
+                self._progress()
+            inner_record(S, cost, a)
+
+        def _children(S, a):
+            self.partitions += 1
+            return inner_children(S, a)
+
+        def _evaluate(S):
+            # Exclusive time: nested evaluations of children are subtracted
+            t0 = clock()
+            self._child_time.append(0.0)
+            try:
+                return inner_evaluate(S)
+            finally:
+                elapsed = clock() - t0
+                seconds_by_pop[bitcount(S)] += elapsed - self._child_time.pop()
+                if self._child_time:
+                    self._child_time[-1] += elapsed
+
+        o._record, o._children = _record, _children
+        if self.timing == "exclusive":
+            o._evaluate = _evaluate
+        st = o.memo.stats()
+        self._memo0 = (st["hits"], st["misses"], st["evictions"])
+        self._t0 = self._last = self._last_report = clock()
+        self._attached = True
+        return self
+
+    def detach(self) -> None:
+        if not self._attached:
+            return
+        for name in ("_record", "_children", "_evaluate"):
+            self.oracle.__dict__.pop(name, None)
+        self.seconds = time.perf_counter() - self._t0
+        st = self.oracle.memo.stats()
+        self.memo_hits = st["hits"] - self._memo0[0]
+        self.memo_misses = st["misses"] - self._memo0[1]
+        self.memo_evictions = st["evictions"] - self._memo0[2]
+        self._attached = False
+
+    def __enter__(self) -> "SolveProfiler":
+        return self.attach()
+
+    def __exit__(self, *exc) -> None:
+        self.detach()
+
+    def _progress(self) -> None:
+        now = time.perf_counter()
+        if now - self._last_report < self.progress_every:
+            return
+        self._last_report = now
+        elapsed = now - self._t0
+        print(f"[profile] {elapsed:.1f}s: {self.states} states ({self.states / elapsed:.0f}/s), "
+              f"memo {len(self.oracle.memo)}, rss {rss_mb():.0f}MB", file=self.stream, flush=True)
+
+    def report(self) -> Dict[str, Any]:
+        o = self.oracle
+        if self._attached:
+            self.detach()
+        if self.seconds is None:
+            # Never attached: there are no counters to report
+            return {"objects": o.n, "attributes": len(o.attrs), "engine": o.engine,
+                    "status": "no solve recorded"}
+        buckets = [{"popcount": b, "states": c, "seconds": s if self.timing != "none" else None}
+                   for b, (c, s) in enumerate(zip(self.count_by_pop, self.seconds_by_pop)) if c]
+        return {"objects": o.n, "attributes": len(o.attrs), "engine": o.engine,
+                "seconds": self.seconds, "states_expanded": self.states,
+                "states_per_second": self.states / self.seconds if self.seconds else None,
+                "partitions_evaluated": self.partitions,
+                "memo_hits": self.memo_hits, "memo_misses": self.memo_misses,
+                "memo_evictions": self.memo_evictions, "memo_size": len(o.memo),
+                "peak_rss_mb": peak_rss_mb(), "timing": self.timing, "by_popcount": buckets}
+
+    def write(self, path: str, **extra) -> Dict[str, Any]:
+        out = {**self.report(), **extra}
+        with open(path, "w") as f:
+            json.dump(out, f, indent=2)
+        return out
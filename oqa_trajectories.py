@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# Every hidden object through a policy at once: objects x turns remaining-candidate matrix
+# and per-turn quantile bands, for plotting against model traces.
+# Usage: python oqa_trajectories.py --dataset oqa_kary200_dataset.json [--policy tree.json|.oqatree]
+#                                   [--csv bands.csv] [--npz traj.npz] [--quantiles 0.1,0.5,0.9]
+#
+# The policy defaults to the optimal one.  Saved trees in any of the repo's formats work:
+# build_optimal_tree / --save_tree JSON, .oqatree, the *_greedy_tree.json baselines and the
+# yes/no trees of oracle_solver_*.py.  Objects are pushed one turn at a time with array
+# indexing only; an object that reached a leaf keeps its leaf's candidate count.
+
+import argparse, csv, json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from oqa_kary_oracle_dp import KaryOracleDP, bitcount, load_weights
+from oqa_kary_numpy import KaryNumpyBackend
+
+class FlatPolicy:
+    """
+    A policy as arrays over its nodes (node 0 = root):
+      attr[node]      attribute index (column of KaryNumpyBackend.codes), -1 at leaves
+      child[node, v]  node reached by answer value index v, -1 if no candidate answers v
+      size[node]      candidates at the node
+    """
+    def __init__(self, attr: Sequence[int], child: np.ndarray, size: Sequence[int]):
+        self.attr = np.asarray(attr, dtype=np.int64)
+        self.child = np.asarray(child, dtype=np.int64)
+        self.size = np.asarray(size, dtype=np.int64)
+
+def _assemble(nodes: List[Tuple[int, Dict[int, int], int]], kmax: int) -> FlatPolicy:
+    # nodes: (attr, {value index: child node}, size or -1); missing sizes sum their children
+    child = np.full((len(nodes), kmax), -1, dtype=np.int64)
+    size = np.array([s for _, _, s in nodes], dtype=np.int64)
+    for i, (_, kids, _) in enumerate(nodes):
+        for v, c in kids.items():
+            child[i, v] = c
+    # Children always follow their parent, so a reverse pass sees them first
+    for i in range(len(nodes) - 1, -1, -1):
+        if size[i] < 0:
+            size[i] = size[child[i][child[i] >= 0]].sum()
+    return FlatPolicy([a for a, _, _ in nodes], child, size)
+
+def optimal_policy(oracle: KaryOracleDP) -> FlatPolicy:
+    """Flatten oracle's optimal policy (solving it first if needed)."""
+    oracle.solve()
+    attr_idx = {a: j for j, a in enumerate(oracle.attrs)}
+    val_idx = {a: {v: k for k, v in enumerate(oracle.M[a])} for a in oracle.attrs}
+    kmax = max([len(oracle.M[a]) for a in oracle.attrs] + [1])
+    nodes: List[Tuple[int, Dict[int, int], int]] = []
+    stack = [(oracle.root, -1, 0)]
+    while stack:
+        S, parent, v = stack.pop()
+        i = len(nodes)
+        if parent >= 0:
+            nodes[parent][1][v] = i
+        a, pairs = oracle._split(S)
+        nodes.append((attr_idx[a] if a else -1, {}, bitcount(S)))
+        for value, T in pairs:
+            stack.append((T, i, val_idx[a][value]))
+    return _assemble(nodes, kmax)
+
+def tree_policy(tree: Dict[str, Any], oracle: KaryOracleDP) -> FlatPolicy:
+    """Flatten a saved tree (optimal, greedy or yes/no solver format) against oracle's encoding."""
+    attr_idx = {a: j for j, a in enumerate(oracle.attrs)}
+    val_idx: Dict[str, Dict[Any, int]] = {}
+    for a in oracle.attrs:
+        # JSON object keys are strings, so also accept json.dumps/str spellings of values
+        idx = {}
+        for k, v in enumerate(oracle.M[a]):
+            idx[json.dumps(v)] = idx[str(v)] = k
+        for k, v in enumerate(oracle.M[a]):
+            idx[v] = k
+        val_idx[a] = idx
+    kmax = max([len(oracle.M[a]) for a in oracle.attrs] + [1])
+    nodes: List[Tuple[int, Dict[int, int], int]] = []
+    stack: List[Tuple[Dict[str, Any], int, int]] = [(tree, -1, 0)]
+    while stack:
+        node, parent, v = stack.pop()
+        i = len(nodes)
+        if parent >= 0:
+            nodes[parent][1][v] = i
+        if node["type"] == "leaf":
+            members = node.get("ids", node.get("candidates", node.get("items", ())))
+            nodes.append((-1, {}, node.get("size", len(members))))
+            continue
+        a = node["attribute"]
+        if a not in attr_idx:
+            raise ValueError(f"tree asks about {a!r}, which the dataset does not have")
+        if node["type"] == "attribute":
+            kids = [(True, node["yes"]), (False, node["no"])]
+        elif isinstance(node["children"], dict):
+            kids = list(node["children"].items())
+        else:
+            kids = [(e["value"], e["subtree"]) for e in node["children"]]
+        nodes.append((attr_idx[a], {}, node.get("size", -1)))
+        for value, sub in kids:
+            if value not in val_idx[a]:
+                raise ValueError(f"tree answers {a}={value!r}, which no object has")
+            stack.append((sub, i, val_idx[a][value]))
+    return _assemble(nodes, kmax)
+
+def load_policy(path: str, oracle: KaryOracleDP) -> FlatPolicy:
+    """Saved tree at path: JSON in any of the repo's formats, or an .oqatree file."""
+    if path.endswith(".oqatree"):
+        from oqa_tree_io import TreeFile
+        t = TreeFile(path)
+        if t.attrs != oracle.attrs or t.ids != oracle.ids:
+            raise ValueError(f"{path} was written for a different dataset")
+        kmax = max([len(oracle.M[a]) for a in oracle.attrs] + [1])
+        child = np.full((t.nodes, kmax), -1, dtype=np.int64)
+        parents = np.flatnonzero(t.nchild)
+        for i in parents.tolist():
+            kids = np.arange(t.first[i], t.first[i] + t.nchild[i])
+            child[i, t.value[kids]] = kids
+        return FlatPolicy(t.attr, child, t.size)
+    with open(path, "r") as f:
+        return tree_policy(json.load(f), oracle)
+
+def trajectories(oracle: KaryOracleDP, policy: Optional[FlatPolicy] = None,
+                 backend: Optional[KaryNumpyBackend] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (R, N), both objects x turns+1.  N[i, t] is the policy node object oracle.ids[i]
+    is at after t questions and R[i, t] = size of that node; column 0 is the root.
+    Rows are padded with the object's leaf, so R[:, -1] are the leaf sizes.
+    """
+    be = backend if backend is not None else KaryNumpyBackend(oracle)
+    if policy is None:
+        policy = optimal_policy(oracle)
+    rows = np.arange(oracle.n)
+    node = np.zeros(oracle.n, dtype=np.int64)
+    cols = [node]
+    while True:
+        a = policy.attr[node]
+        active = a >= 0
+        if not active.any():
+            break
+        nxt = policy.child[node[active], be.codes[rows[active], a[active]]]
+        if (nxt < 0).any():
+            bad = rows[active][nxt < 0][0]
+            raise ValueError(f"policy has no branch for object {oracle.ids[bad]!r}")
+        node = node.copy()
+        node[active] = nxt
+        cols.append(node)
+    N = np.stack(cols, axis=1)
+    return policy.size[N], N
+
+def depths(N: np.ndarray, policy: FlatPolicy) -> np.ndarray:
+    """Questions asked per object, counting questions that do not shrink the candidates."""
+    return (policy.attr[N] >= 0).sum(axis=1)
+
+def entropy_bits(N: np.ndarray, weights: Optional[Sequence[float]] = None) -> np.ndarray:
+    """
+    (objects x turns) entropy in bits of the prior restricted to each object's
+    remaining candidates (the objects sharing its node); log2(count) when uniform.
+    """
+    w = np.ones(N.shape[0]) if weights is None else np.asarray(weights, dtype=np.float64)
+    wlw = w * np.log2(w)
+    H = np.empty(N.shape, dtype=np.float64)
+    nodes = int(N.max()) + 1
+    for t in range(N.shape[1]):
+        col = N[:, t]
+        # H = log2 M - sum(w log2 w) / M over the objects at each node, M their mass
+        m = np.bincount(col, w, minlength=nodes)
+        e = np.bincount(col, wlw, minlength=nodes)
+        h = np.log2(m, out=np.zeros_like(m), where=m > 0) - np.divide(e, m, out=np.zeros_like(e), where=m > 0)
+        H[:, t] = np.maximum(h[col], 0.0)
+    return H
+
+def weighted_quantiles(R: np.ndarray, qs: Sequence[float], weights: Optional[Sequence[float]] = None) -> np.ndarray:
+    """(len(qs) x turns) per-turn quantiles of R's columns; weights are per row (prior)."""
+    if weights is None:
+        return np.quantile(R, qs, axis=0, method="inverted_cdf")
+    w = np.asarray(weights, dtype=np.float64)
+    order = np.argsort(R, axis=0, kind="stable")
+    srt = np.take_along_axis(R, order, axis=0)
+    cum = np.cumsum(w[order], axis=0) / w.sum()
+    out = np.empty((len(qs), R.shape[1]), dtype=R.dtype)
+    for k, q in enumerate(qs):
+        # First row whose cumulative weight reaches q, as inverted_cdf does unweighted
+        idx = np.minimum((cum < q - 1e-12).sum(axis=0), R.shape[0] - 1)
+        out[k] = srt[idx, np.arange(R.shape[1])]
+    return out
+
+def bands(R: np.ndarray, N: np.ndarray, policy: FlatPolicy, qs: Sequence[float] = (0.1, 0.5, 0.9),
+          weights: Optional[Sequence[float]] = None) -> Dict[str, np.ndarray]:
+    """Per-turn mean, prior entropy, quantiles, min/max and finished fraction of R."""
+    w = np.full(R.shape[0], 1.0 / R.shape[0]) if weights is None else np.asarray(weights) / np.sum(weights)
+    d = depths(N, policy)
+    out = {"turn": np.arange(R.shape[1]),
+           "mean": w @ R,
+           "mean_entropy_bits": w @ entropy_bits(N, weights),
+           "min": R.min(axis=0), "max": R.max(axis=0),
+           "finished": np.array([w[d <= t].sum() for t in range(R.shape[1])])}
+    for q, row in zip(qs, weighted_quantiles(R, qs, weights)):
+        out[f"p{round(100 * q):02d}"] = row
+    return out
+
+def write_bands_csv(b: Dict[str, np.ndarray], path: str) -> None:
+    keys = list(b)
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(keys)
+        for t in range(len(b["turn"])):
+            w.writerow([f"{b[k][t]:.6f}" if b[k].dtype.kind == "f" else int(b[k][t]) for k in keys])
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-object trajectories and quantile bands for a policy")
+    ap.add_argument("--dataset", required=True, help="JSON mapping id -> {attr: value}, or .oqabin")
+    ap.add_argument("--policy", default=None, help="Saved tree (JSON or .oqatree); default: optimal")
+    ap.add_argument("--weights", default=None, help="Prior sidecar: weights the bands and the optimum")
+    ap.add_argument("--quantiles", default="0.1,0.5,0.9", help="Comma-separated quantiles")
+    ap.add_argument("--csv", default=None, help="Per-turn bands CSV")
+    ap.add_argument("--npz", default=None, help="NPZ with the count and node matrices, ids, depths and bands")
+    args = ap.parse_args()
+
+    from oqa_dataset_bin import load_objects
+    oracle = KaryOracleDP(load_objects(args.dataset),
+                          weights=load_weights(args.weights) if args.weights else None)
+    policy = load_policy(args.policy, oracle) if args.policy else optimal_policy(oracle)
+    R, N = trajectories(oracle, policy)
+    qs = [float(q) for q in args.quantiles.split(",") if q]
+    b = bands(R, N, policy, qs, oracle.weights)
+    d = depths(N, policy)
+    mean_depth = float(np.dot(d, oracle.weights)) if oracle.weights is not None else float(d.mean())
+    print(f"Objects: {oracle.n}, turns: {R.shape[1] - 1}, expected questions: {mean_depth:.6f}, "
+          f"max depth: {int(d.max())}")
+    if args.csv:
+        write_bands_csv(b, args.csv)
+        print(f"Wrote {args.csv}")
+    if args.npz:
+        np.savez_compressed(args.npz, remaining=R, node=N, ids=np.array(oracle.ids), depth=d, **b)
+        print(f"Wrote {args.npz}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# Streaming export of optimal trees: indented JSON written node by node, and a compact
+# binary tree file (.oqatree) with flat node arrays for random access.
+# Usage: python oqa_tree_io.py tree.oqatree [--json tree.json]
+#
+# .oqatree layout (little-endian, sections aligned to 8 bytes):
+#   magic    b"OQATRE01"
+#   uint64   header length H, then H bytes of JSON: n, ids, attrs, values, nodes, leaf_ids, fingerprint
+#   int16    attr[node]      attribute index asked at the node, -1 for leaves
+#   int16    value[node]     value index of the answer leading to the node, -1 for the root
+#   int32    size[node]      candidates at the node
+#   int32    first[node]     index of the first child; children of a node are contiguous
+#   uint16   nchild[node]
+#   int64    leaf_start[node] offset of a leaf's candidates in leaf_ids (size[node] of them)
+#   int32    leaf_ids        object indices (into ids) of every leaf, ascending per leaf
+# Node 0 is the root and every child has a larger index than its parent.
+
+import argparse, json
+from array import array
+from typing import Any, Dict, List, Optional, TextIO
+
+import numpy as np
+
+from oqa_dataset_bin import align, read_header, write_header
+from oqa_kary_oracle_dp import KaryOracleDP, bitcount, mask_indices
+
+MAGIC = b"OQATRE01"
+EXT = ".oqatree"
+
+def write_tree_json(oracle: KaryOracleDP, out: TextIO, S: Optional[int] = None, indent: Optional[int] = 2) -> int:
+    """
+    Write oracle's optimal tree below S as JSON, depth first, one node at a time.
+    The text is exactly json.dump(oracle.build_optimal_tree(S), out, indent=indent),
+    but only the open path (a stack of depth x branching pending items) is held in
+    memory.  Returns the number of nodes written.
+    """
+    if S is None:
+        S = oracle.root
+    nl = "\n" if indent is not None else ""
+    item_sep = "," if indent is not None else ", "
+
+    def pad(level: int) -> str:
+        return nl + " " * (indent * level) if indent is not None else ""
+
+    def value(v: Any, level: int) -> str:
+        text = json.dumps(v, indent=indent)
+        return text.replace("\n", pad(level)) if indent is not None else text
+
+    def expand(T: int, level: int) -> List[Any]:
+        node = oracle._tree_node(T)
+        items: List[Any] = ["{"]
+        for k, key in enumerate(node):
+            items.append((item_sep if k else "") + pad(level + 1) + json.dumps(key) + ": ")
+            if key != "children":
+                items.append(value(node[key], level + 1))
+                continue
+            items.append("[")
+            for c, entry in enumerate(node["children"]):
+                items.append((item_sep if c else "") + pad(level + 2) + "{")
+                fields = [f for f in entry if f != "mask"]
+                for f, name in enumerate(fields):
+                    items.append((item_sep if f else "") + pad(level + 3) + json.dumps(name) + ": "
+                                 + value(entry[name], level + 3))
+                items.append(item_sep + pad(level + 3) + '"subtree": ')
+                items.append((entry["mask"], level + 3))
+                items.append(pad(level + 2) + "}")
+            items.append(pad(level + 1) + "]")
+        items.append(pad(level) + "}")
+        return items
+
+    count = 0
+    stack: List[Any] = [(S, 0)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            out.write(item)
+            continue
+        stack.extend(reversed(expand(*item)))
+        count += 1
+    return count
+
+def write_tree_bin(oracle: KaryOracleDP, path: str, S: Optional[int] = None) -> int:
+    """Write oracle's optimal tree below S as an .oqatree file; returns the node count."""
+    if S is None:
+        S = oracle.root
+    attr_idx = {a: j for j, a in enumerate(oracle.attrs)}
+    val_idx = {a: {v: k for k, v in enumerate(oracle.M[a])} for a in oracle.attrs}
+    attr, val, size = array("h", [-1]), array("h", [-1]), array("i", [0])
+    first, nchild, leaf_start = array("i", [0]), array("H", [0]), array("q", [-1])
+    leaf_ids = array("i")
+    stack = [(S, 0)]
+    while stack:
+        T, i = stack.pop()
+        size[i] = bitcount(T)
+        a, pairs = oracle._split(T)
+        if not a:
+            leaf_start[i] = len(leaf_ids)
+            leaf_ids.extend(mask_indices(T))
+            continue
+        # Children get consecutive indices now, so they stay contiguous whatever the visit order
+        attr[i], first[i], nchild[i] = attr_idx[a], len(attr), len(pairs)
+        for v, child in pairs:
+            stack.append((child, len(attr)))
+            attr.append(-1)
+            val.append(val_idx[a][v])
+            size.append(0)
+            first.append(0)
+            nchild.append(0)
+            leaf_start.append(-1)
+    meta = {"n": oracle.n, "ids": oracle.ids, "attrs": oracle.attrs,
+            "values": {a: list(oracle.M[a]) for a in oracle.attrs},
+            "nodes": len(attr), "leaf_ids": len(leaf_ids), "fingerprint": oracle.fingerprint}
+    with open(path, "wb") as f:
+        pos = write_header(f, MAGIC, meta)
+        for arr in (attr, val, size, first, nchild, leaf_start, leaf_ids):
+            f.write(b"\0" * (align(pos) - pos))
+            pos = align(pos)
+            data = arr.tobytes()
+            f.write(data)
+            pos += len(data)
+    return len(attr)
+
+class TreeFile:
+    """
+    Memory-mapped .oqatree: flat node arrays (attr, value, size, first, nchild,
+    leaf_start) plus the leaf candidate indices.  Nodes are read without
+    loading the rest of the tree; to_dict() rebuilds build_optimal_tree's format.
+    """
+    _DTYPES = (("attr", np.int16), ("value", np.int16), ("size", np.int32), ("first", np.int32),
+               ("nchild", np.uint16), ("leaf_start", np.int64))
+
+    def __init__(self, path: str):
+        self.path = path
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        meta, pos = read_header(raw, MAGIC, path, f"an {EXT} tree")
+        self.n: int = meta["n"]
+        self.ids: List[str] = meta["ids"]
+        self.attrs: List[str] = meta["attrs"]
+        self.values: Dict[str, List[Any]] = meta["values"]
+        self.fingerprint: str = meta["fingerprint"]
+        self.nodes: int = meta["nodes"]
+        for name, dt in self._DTYPES + (("leaf_ids", np.int32),):
+            pos = align(pos)
+            count = meta["leaf_ids"] if name == "leaf_ids" else self.nodes
+            nbytes = count * np.dtype(dt).itemsize
+            setattr(self, name, raw[pos:pos + nbytes].view(dt))
+            pos += nbytes
+
+    def is_leaf(self, i: int) -> bool:
+        return self.attr[i] < 0
+
+    def attribute(self, i: int) -> str:
+        return self.attrs[self.attr[i]] if self.attr[i] >= 0 else ""
+
+    def children(self, i: int) -> range:
+        return range(int(self.first[i]), int(self.first[i]) + int(self.nchild[i]))
+
+    def child(self, i: int, answer: Any) -> Optional[int]:
+        """Node reached from i when its question is answered `answer` (None if no candidate has it)."""
+        vals = self.values[self.attribute(i)]
+        for j in self.children(i):
+            if vals[self.value[j]] == answer:
+                return j
+        return None
+
+    def leaf_ids_of(self, i: int) -> List[str]:
+        start = int(self.leaf_start[i])
+        return [self.ids[k] for k in self.leaf_ids[start:start + int(self.size[i])].tolist()]
+
+    def depths(self) -> np.ndarray:
+        """Depth of every node; parents precede children, so one pass per level suffices."""
+        parent = np.zeros(self.nodes, dtype=np.int64)
+        internal = np.flatnonzero(self.nchild)
+        for i in internal.tolist():
+            parent[self.first[i]:self.first[i] + self.nchild[i]] = i
+        depth = np.zeros(self.nodes, dtype=np.int64)
+        while True:
+            nxt = depth.copy()
+            nxt[1:] = depth[parent[1:]] + 1
+            if np.array_equal(nxt, depth):
+                return depth
+            depth = nxt
+
+    def expected_depth(self, weights: Optional[np.ndarray] = None) -> float:
+        """Expected number of questions: uniform prior, or per-object weights in ids order."""
+        depth = self.depths()
+        leaves = np.flatnonzero(self.attr < 0)
+        if weights is None:
+            return float((depth[leaves] * self.size[leaves]).sum() / self.n)
+        w = np.asarray(weights, dtype=np.float64)
+        mass = np.array([w[self.leaf_ids[s:s + c]].sum()
+                         for s, c in zip(self.leaf_start[leaves].tolist(), self.size[leaves].tolist())])
+        return float((depth[leaves] * mass).sum() / w.sum())
+
+    def to_dict(self, i: int = 0) -> Dict[str, Any]:
+        """Nested tree as KaryOracleDP.build_optimal_tree returns it (uniform-prior fields)."""
+        root: Dict[str, Any] = {}
+        stack = [(i, root)]
+        while stack:
+            j, node = stack.pop()
+            if self.is_leaf(j):
+                node.update(type="leaf", size=int(self.size[j]), ids=self.leaf_ids_of(j))
+                continue
+            a = self.attribute(j)
+            node.update(type="node", attribute=a, size=int(self.size[j]), children=[])
+            for c in self.children(j):
+                sub: Dict[str, Any] = {}
+                node["children"].append({"value": self.values[a][self.value[c]],
+                                         "subset_size": int(self.size[c]), "subtree": sub})
+                stack.append((c, sub))
+        return root
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or convert a binary optimal tree")
+    ap.add_argument("tree", help=f"{EXT} file written by oqa_kary_oracle_dp.py --save_tree")
+    ap.add_argument("--json", default=None, help="Also write the tree as indented JSON")
+    args = ap.parse_args()
+    t = TreeFile(args.tree)
+    leaves = int((t.attr < 0).sum())
+    print(f"Nodes: {t.nodes}, leaves: {leaves}, objects: {t.n}, "
+          f"expected questions (uniform prior): {t.expected_depth():.6f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(t.to_dict(), f, indent=2)
+        print(f"Wrote {args.json}")
+
+if __name__ == "__main__":
+    main()
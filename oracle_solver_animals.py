@@ -1,80 +1,17 @@
-import math
+import argparse, json, math, os
+
+from oqa_boolean_engine import BooleanOracleDP
 
 # ---------- Decision tree construction ----------
 
 def build_decision_tree(possible_items, data, memo=None):
-    """Globally optimal yes-no tree that minimizes expected questions."""
-    if memo is None:
-        memo = {}
-
-    if len(possible_items) == 1:
-        return {"type": "leaf", "items": set(possible_items)}
-
-    key = frozenset(possible_items)
-    if key in memo:
-        return memo[key]
-
-    # All attributes present in this subset
-    attributes = set()
-    for item in possible_items:
-        attributes.update(data[item].keys())
-
-    if not attributes:
-        leaf = {"type": "leaf", "items": set(possible_items)}
-        memo[key] = leaf
-        return leaf
-
-    n = len(possible_items)
-    best_subtree = None
-    best_cost = float("inf")
-
-    for attr in attributes:
-        yes_set = {i for i in possible_items if data[i][attr]}
-        no_set = possible_items - yes_set
-        if not yes_set or not no_set:
-            continue  # no split
-
-        yes_sub = build_decision_tree(yes_set, data, memo)
-        no_sub = build_decision_tree(no_set, data, memo)
-
-        p_yes = len(yes_set) / n
-        p_no = 1.0 - p_yes
-        cost = 1.0 + p_yes * expected_cost(yes_sub, yes_set, data) \
-                    + p_no * expected_cost(no_sub, no_set, data)
-
-        if cost < best_cost:
-            best_cost = cost
-            best_subtree = {
-                "type": "attribute",
-                "attribute": attr,
-                "yes": yes_sub,
-                "no": no_sub,
-            }
-
-    if best_subtree is None:
-        leaf = {"type": "leaf", "items": set(possible_items)}
-        memo[key] = leaf
-        return leaf
-
-    memo[key] = best_subtree
-    return best_subtree
-
-
-def expected_cost(tree, possible_items, data):
-    """Expected number of further questions under a uniform prior."""
-    if tree["type"] == "leaf":
-        return 0.0
-
-    attr = tree["attribute"]
-    yes_set = {i for i in possible_items if data[i][attr]}
-    no_set = possible_items - yes_set
-
-    n = len(possible_items)
-    p_yes = len(yes_set) / n
-    p_no = 1.0 - p_yes
-
-    return 1.0 + p_yes * expected_cost(tree["yes"], yes_set, data) \
-               + p_no  * expected_cost(tree["no"],  no_set,  data)
+    """
+    Globally optimal yes-no tree that minimizes expected questions.
+    Returns (tree, expected number of questions under a uniform prior).
+    Pass a StateMemo as memo to reuse solved states across calls.
+    """
+    engine = BooleanOracleDP(data, memo=memo)
+    return engine.build_tree(engine.mask_of(possible_items))
 
 
 # ---------- Interactive querying ----------
@@ -118,10 +55,19 @@ def ask_question(tree, hidden_item, possible_items, data):
 # ---------- Demo ----------
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Optimal yes/no oracle over boolean animal attributes")
+    ap.add_argument("--dataset", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "25_Animals.json"),
+                    help="JSON mapping animal -> {attr: bool}")
+    ap.add_argument("--hidden", default="tiger", help="Animal the oracle has in mind")
+    args = ap.parse_args()
+
+    with open(args.dataset, "r") as f:
+        animals = json.load(f)
     all_animals = set(animals.keys())
-    decision_tree = build_decision_tree(all_animals, animals)
+    decision_tree, cost = build_decision_tree(all_animals, animals)
+    print(f"Optimal expected number of questions (uniform prior): {cost:.6f}\n")
 
-    hidden = "tiger"      # pick any animal from the dictionary
+    hidden = args.hidden
 
     print("---- Decision Tree Query ----\n")
     final_candidates = ask_question(decision_tree, hidden, all_animals, animals)
@@ -1,84 +1,15 @@
-import math
+import argparse, json, math, os
 
-def build_decision_tree(possible_cars, data, memo=None):
-    """Globally optimal yes-no tree that minimizes expected questions."""
-    if memo is None:
-        memo = {}
-
-    if len(possible_cars) == 1:
-        return {"type": "leaf", "cars": set(possible_cars)}
-
-    key = frozenset(possible_cars)
-    if key in memo:
-        return memo[key]
-
-    # All attributes present in this subset
-    attributes = set()
-    for car in possible_cars:
-        attributes.update(data[car].keys())
-
-    if not attributes:
-        leaf = {"type": "leaf", "cars": set(possible_cars)}
-        memo[key] = leaf
-        return leaf
-
-    n = len(possible_cars)
-    best_subtree = None
-    best_cost = float("inf")
-
-    for attr in attributes:
-        yes_set = {c for c in possible_cars if data[c][attr]}
-        no_set = possible_cars - yes_set
-        if not yes_set or not no_set:
-            continue  # no split
-
-        yes_sub = build_decision_tree(yes_set, data, memo)
-        no_sub = build_decision_tree(no_set, data, memo)
-
-        p_yes = len(yes_set) / n
-        p_no = 1.0 - p_yes
-        cost = (
-            1.0
-            + p_yes * compute_expected_cost(yes_sub, yes_set)
-            + p_no * compute_expected_cost(no_sub, no_set)
-        )
-
-        if cost < best_cost:
-            best_cost = cost
-            best_subtree = {
-                "type": "attribute",
-                "attribute": attr,
-                "yes": yes_sub,
-                "no": no_sub,
-            }
-
-    if best_subtree is None:
-        leaf = {"type": "leaf", "cars": set(possible_cars)}
-        memo[key] = leaf
-        return leaf
-
-    memo[key] = best_subtree
-    return best_subtree
+from oqa_boolean_engine import BooleanOracleDP
 
-
-def compute_expected_cost(tree, possible_cars):
-    """Expected number of further questions under a uniform prior."""
-    if tree["type"] == "leaf":
-        return 0.0
-
-    attr = tree["attribute"]
-    yes_set = {c for c in possible_cars if cars[c][attr]}
-    no_set = possible_cars - yes_set
-
-    n = len(possible_cars)
-    p_yes = len(yes_set) / n
-    p_no = 1.0 - p_yes
-
-    return (
-        1.0
-        + p_yes * compute_expected_cost(tree["yes"], yes_set)
-        + p_no * compute_expected_cost(tree["no"], no_set)
-    )
+def build_decision_tree(possible_cars, data, memo=None):
+    """
+    Globally optimal yes-no tree that minimizes expected questions.
+    Returns (tree, expected number of questions under a uniform prior).
+    Pass a StateMemo as memo to reuse solved states across calls.
+    """
+    engine = BooleanOracleDP(data, memo=memo, leaf_key="cars")
+    return engine.build_tree(engine.mask_of(possible_cars))
 
 
 def ask_question(tree, hidden_car, possible_cars):
@@ -119,10 +50,19 @@ def ask_question(tree, hidden_car, possible_cars):
     )
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Optimal yes/no oracle over boolean car attributes")
+    ap.add_argument("--dataset", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "25_Cars.json"),
+                    help="JSON mapping car -> {attr: bool}")
+    ap.add_argument("--hidden", default="Mini Cooper", help="Car the oracle has in mind")
+    args = ap.parse_args()
+
+    with open(args.dataset, "r") as f:
+        cars = json.load(f)
     all_cars = set(cars.keys())
-    decision_tree = build_decision_tree(all_cars, cars)
+    decision_tree, cost = build_decision_tree(all_cars, cars)
+    print(f"Optimal expected number of questions (uniform prior): {cost:.6f}\n")
 
-    hidden = "Mini Cooper"  # change as you like
+    hidden = args.hidden
 
     print("---- Decision Tree Query ----\n")
     final_candidates = ask_question(decision_tree, hidden, all_cars)
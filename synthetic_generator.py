@@ -1,20 +1,141 @@
-import itertools, random, json
+#!/usr/bin/env python3
+# Streaming synthetic datasets: N unique objects over d attributes with k values each.
+# Usage: python synthetic_generator.py --n 100 --d 11 [--k 2] [--seed 0] [--out 100_Synthetic.json]
+#        python synthetic_generator.py --n 1000000 --d 24 --k 4 --format ndjson --out big.ndjson
+#
+# Objects are drawn as distinct ranks of the Cartesian product and decoded digit by
+# digit (first attribute most significant, as itertools.product orders them), so the
+# product is never enumerated.  Ids are the rank in hex, f"{rank:10x}", matching
+# 25_Synthetic.json / 100_Synthetic.json; k == 2 gives boolean attributes.
 
-def generate_synthetic_data():
-    attributes = ["a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k"]
-    data = {}
-    for i, combo in enumerate(itertools.product([False, True], repeat=len(attributes))):
-        data[f"{i:10x}"] = dict(zip(attributes, combo))
-    return data
+import argparse, json, random, string, sys
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
 
-data = generate_synthetic_data()
+def attribute_names(d: int) -> List[str]:
+    """a, b, ..., z, then a0, b0, ... for wider datasets."""
+    letters = string.ascii_lowercase
+    return [letters[j % 26] + (str(j // 26 - 1) if j >= 26 else "") for j in range(d)]
 
-def subset(n):
-    keys = random.sample(list(data.keys()), n)
-    return {k: data[k] for k in keys}
+def rank_to_digits(rank: int, d: int, k: int) -> List[int]:
+    digits = [0] * d
+    for j in range(d - 1, -1, -1):
+        rank, digits[j] = divmod(rank, k)
+    return digits
 
-subset_25  = subset(25)
-subset_100 = subset(100)
+def digits_to_rank(digits: List[int], k: int) -> int:
+    rank = 0
+    for x in digits:
+        rank = rank * k + x
+    return rank
 
-print(json.dumps(subset_25, indent=2, sort_keys=True))
-print(json.dumps(subset_100, indent=2, sort_keys=True))
+def sample_ranks(n: int, d: int, k: int, rng: random.Random, correlation: float = 0.0,
+                 max_tries: int = 100) -> List[int]:
+    """
+    n distinct ranks in increasing order.  Uncorrelated draws sample the rank range
+    directly (O(n) memory however large k**d is).  With correlation > 0 each attribute
+    repeats the previous attribute's value with that probability, else draws uniformly;
+    vectors are redrawn until n distinct ones exist.
+    """
+    total = k ** d
+    if n > total:
+        raise ValueError(f"only {total} distinct objects exist for d={d}, k={k}")
+    if correlation <= 0.0:
+        if total <= sys.maxsize:
+            return sorted(rng.sample(range(total), n))
+        # range() longer than sys.maxsize has no len(), so rng.sample cannot take it;
+        # with this many ranks, rejection of repeats almost never triggers
+        picked = set()
+        while len(picked) < n:
+            picked.add(rng.randrange(total))
+        return sorted(picked)
+    seen = set()
+    budget = max_tries * n
+    while len(seen) < n:
+        if budget == 0:
+            raise ValueError(f"could not draw {n} distinct objects at correlation={correlation}")
+        budget -= 1
+        digits = [rng.randrange(k)]
+        for _ in range(d - 1):
+            digits.append(digits[-1] if rng.random() < correlation else rng.randrange(k))
+        seen.add(digits_to_rank(digits, k))
+    return sorted(seen)
+
+def iter_objects(n: int, d: int, k: int = 2, seed: Optional[int] = None,
+                 duplicates: float = 0.0, correlation: float = 0.0,
+                 attrs: Optional[List[str]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (id, {attr: value}) for n objects in id order.  A fraction `duplicates` of
+    them repeat the attribute vector of another object (ids f"{rank:10x}#c"), so
+    those classes cannot be told apart by any question.
+    """
+    if not 0.0 <= duplicates < 1.0:
+        raise ValueError("duplicates must be in [0, 1)")
+    rng = random.Random(seed)
+    attrs = attrs or attribute_names(d)
+    n_dup = int(round(n * duplicates))
+    ranks = sample_ranks(n - n_dup, d, k, rng, correlation)
+    copies = Counter(rng.choice(ranks) for _ in range(n_dup))
+    values = [False, True] if k == 2 else [f"v{x}" for x in range(k)]
+    for rank in ranks:
+        obj = {a: values[x] for a, x in zip(attrs, rank_to_digits(rank, d, k))}
+        yield f"{rank:10x}", obj
+        for c in range(1, copies.get(rank, 0) + 1):
+            yield f"{rank:10x}#{c}", dict(obj)
+
+def write_json(objects: Iterator[Tuple[str, Dict[str, Any]]], out: TextIO, indent: Optional[int] = 2) -> int:
+    """Oracle JSON ({id: {attr: value}}), written one object at a time; returns the count."""
+    count = 0
+    out.write("{")
+    for oid, obj in objects:
+        if indent is None:
+            out.write(("," if count else "") + json.dumps(oid) + ":" + json.dumps(obj, separators=(",", ":")))
+        else:
+            body = json.dumps(obj, indent=indent).replace("\n", "\n" + " " * indent)
+            out.write(("," if count else "") + "\n" + " " * indent + json.dumps(oid) + ": " + body)
+        count += 1
+    out.write("\n}\n" if indent is not None and count else "}\n")
+    return count
+
+def write_ndjson(objects: Iterator[Tuple[str, Dict[str, Any]]], out: TextIO) -> int:
+    """One {"id": ..., "attrs": {...}} record per line; returns the count."""
+    count = 0
+    for oid, obj in objects:
+        out.write(json.dumps({"id": oid, "attrs": obj}, separators=(",", ":")) + "\n")
+        count += 1
+    return count
+
+def subset(n: int, seed: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """n random objects over the 11 boolean attributes a..k of the shipped Synthetic sets."""
+    return dict(iter_objects(n, 11, 2, seed))
+
+def main():
+    ap = argparse.ArgumentParser(description="Stream a synthetic dataset of unique objects")
+    ap.add_argument("--n", type=int, default=25, help="Number of objects")
+    ap.add_argument("--d", type=int, default=11, help="Number of attributes")
+    ap.add_argument("--k", type=int, default=2, help="Values per attribute (2 = boolean)")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--format", default="json", choices=("json", "ndjson"))
+    ap.add_argument("--indent", type=int, default=2, help="JSON indent; negative for compact")
+    ap.add_argument("--duplicates", type=float, default=0.0,
+                    help="Fraction of objects that repeat another object's attribute vector")
+    ap.add_argument("--correlation", type=float, default=0.0,
+                    help="Probability an attribute repeats the previous attribute's value")
+    ap.add_argument("--out", default="-", help="Output path ('-' for stdout)")
+    args = ap.parse_args()
+
+    objects = iter_objects(args.n, args.d, args.k, args.seed, args.duplicates, args.correlation)
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    try:
+        if args.format == "ndjson":
+            count = write_ndjson(objects, out)
+        else:
+            count = write_json(objects, out, args.indent if args.indent >= 0 else None)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if out is not sys.stdout:
+        print(f"Wrote {count} objects to {args.out}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os, sys
+
+# The modules live at the repository root as flat scripts
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
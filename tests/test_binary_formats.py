@@ -0,0 +1,49 @@
+# The binary formats (.oqabin, .oqatree, .oqapol) share one header writer and validator.
+import json, os
+
+import pytest
+
+from oqa_dataset_bin import CompiledDataset, compile_objects
+from oqa_kary_oracle_dp import KaryOracleDP
+from oqa_policy import PolicyTable, compile_policy
+from oqa_tree_io import TreeFile, write_tree_bin
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def files(tmp_path):
+    with open(os.path.join(ROOT, "25_Cars.json")) as f:
+        objects = json.load(f)
+    oracle = KaryOracleDP(objects)
+    paths = {CompiledDataset: str(tmp_path / "cars.oqabin"), TreeFile: str(tmp_path / "cars.oqatree"),
+             PolicyTable: str(tmp_path / "cars.oqapol")}
+    compile_objects(objects, paths[CompiledDataset])
+    write_tree_bin(oracle, paths[TreeFile])
+    compile_policy(oracle, paths[PolicyTable])
+    return oracle, paths
+
+def test_round_trip(files):
+    oracle, paths = files
+    assert CompiledDataset(paths[CompiledDataset]).ids == oracle.ids
+    assert TreeFile(paths[TreeFile]).to_dict() == oracle.build_optimal_tree()
+    assert PolicyTable(paths[PolicyTable]).lookup(oracle.root)[0] == oracle.best_attr(oracle.root)
+
+def test_wrong_kind_version_and_truncation(files, tmp_path):
+    _, paths = files
+    for cls, path in paths.items():
+        for other_cls, other in paths.items():
+            if other_cls is not cls:
+                with pytest.raises(ValueError, match="is not"):
+                    cls(other)
+        with open(path, "rb") as f:
+            data = f.read()
+        bumped = str(tmp_path / "bumped")
+        with open(bumped, "wb") as f:
+            f.write(data[:6] + b"99" + data[8:])
+        with pytest.raises(ValueError, match="version 99"):
+            cls(bumped)
+        short = str(tmp_path / "short")
+        with open(short, "wb") as f:
+            f.write(data[:40])
+        with pytest.raises(ValueError, match="truncated"):
+            cls(short)
@@ -0,0 +1,44 @@
+# Every exact engine must reproduce the serial recursive solve bit for bit:
+# cost, optimal tree and expected curve (ties included).
+import json, os
+
+import pytest
+
+from oqa_kary_oracle_dp import KaryOracleDP
+from oqa_kary_parallel import solve_parallel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS = [f"{n}_{name}.json" for n in (25, 100) for name in ("Animals", "Cars", "Places", "Synthetic")]
+DATASETS.append(os.path.join("k-ary-100", "oqa_kary100_dataset.json"))
+VARIANTS = ["iterative", "numpy", "bnb", "workers"]
+
+_reference = {}
+
+def _load(dataset):
+    with open(os.path.join(ROOT, dataset)) as f:
+        return json.load(f)
+
+def _result(oracle, cost):
+    return cost, json.dumps(oracle.build_optimal_tree()), oracle.expected_curve()
+
+def reference(dataset):
+    if dataset not in _reference:
+        oracle = KaryOracleDP(_load(dataset))
+        _reference[dataset] = _result(oracle, oracle.solve())
+    return _reference[dataset]
+
+@pytest.mark.parametrize("variant", VARIANTS)
+@pytest.mark.parametrize("dataset", DATASETS)
+def test_engine_matches_recursive(dataset, variant):
+    objects = _load(dataset)
+    if variant == "workers":
+        oracle = KaryOracleDP(objects)
+        cost = solve_parallel(oracle, workers=2)
+    else:
+        oracle = KaryOracleDP(objects, **({"bnb": True} if variant == "bnb" else {"engine": variant}))
+        cost = oracle.solve()
+    cost, tree, curve = _result(oracle, cost)
+    ref_cost, ref_tree, ref_curve = reference(dataset)
+    assert cost == ref_cost
+    assert tree == ref_tree
+    assert curve == ref_curve
@@ -0,0 +1,44 @@
+# Capped memos: recency-aware eviction, and capped solves matching uncapped ones.
+import json, os
+
+import pytest
+
+from oqa_kary_oracle_dp import KaryOracleDP
+from oqa_memo import StateMemo
+from oqa_memo_compact import CompactMemo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize("cls", [StateMemo, CompactMemo])
+def test_recently_used_small_state_survives(cls):
+    memo = cls(max_entries=8, evict_fraction=0.25)
+    for S in range(1, 9):
+        memo.put(S, float(S), "a")
+    assert memo.get(1) == (1.0, "a")
+    memo.put(255, 9.0, "b")
+    assert 1 in memo and 255 in memo
+    assert len(memo) == 7
+
+@pytest.mark.parametrize("cls", [StateMemo, CompactMemo])
+@pytest.mark.parametrize("dataset,cap", [("25_Cars.json", 1500),
+                                         (os.path.join("k-ary-300", "oqa_kary300_dataset.json"), 500)])
+def test_capped_solve_matches_uncapped(cls, dataset, cap):
+    with open(os.path.join(ROOT, dataset)) as f:
+        objects = json.load(f)
+    plain = KaryOracleDP(objects)
+    capped = KaryOracleDP(objects, memo=cls(max_entries=cap))
+    assert capped.solve() == plain.solve()
+    assert capped.memo.stats()["evictions"] > 0
+    assert json.dumps(capped.build_optimal_tree()) == json.dumps(plain.build_optimal_tree())
+    assert capped.expected_curve() == plain.expected_curve()
+
+def test_boolean_engine_binds_memo_to_dataset():
+    from oqa_boolean_engine import BooleanOracleDP
+    memo = StateMemo()
+    cars = BooleanOracleDP.from_path(os.path.join(ROOT, "25_Cars.json"), memo=memo)
+    cost = cars.optimal_cost(cars.root)
+    # Same dataset again: the filled memo is reused as-is
+    again = BooleanOracleDP.from_path(os.path.join(ROOT, "25_Cars.json"), memo=memo)
+    assert again.optimal_cost(again.root) == cost
+    with pytest.raises(ValueError):
+        BooleanOracleDP.from_path(os.path.join(ROOT, "25_Animals.json"), memo=memo)
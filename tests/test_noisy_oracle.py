@@ -0,0 +1,75 @@
+# Noisy-answer oracle: the noiseless limit is KaryOracleDP, and small noisy cases match brute force.
+import json, os
+
+import numpy as np
+
+from oqa_kary_oracle_dp import KaryOracleDP
+from oqa_noisy_oracle import NoiseModel, NoisyOracleDP, symmetric_confusion
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def oracle(name):
+    with open(os.path.join(ROOT, name)) as f:
+        return KaryOracleDP(json.load(f))
+
+def test_noiseless_matches_expected_curve():
+    for name in ("25_Cars.json", os.path.join("k-ary-100", "oqa_kary100_dataset.json")):
+        o = oracle(name)
+        dp = NoisyOracleDP(o, NoiseModel(o, flip=0.0), horizon=10, confidence=1.0)
+        assert abs(dp.solve() - o.solve()) < 1e-9
+        ref, curve = o.expected_curve(), dp.expected_curve()
+        assert curve["turn"] == ref["turn"]
+        for key in ("E_candidates", "E_entropy_bits", "leaf_mass"):
+            assert np.allclose(curve[key], ref[key], atol=1e-9), key
+
+def test_noiseless_cost_with_float_ties():
+    # 25_Animals has optimal questions whose costs differ only in the last bit, so the
+    # two DPs may pick different (equally good) policies; the costs still agree, and
+    # the expected questions are the summed mass of unfinished dialogs per turn
+    o = oracle("25_Animals.json")
+    dp = NoisyOracleDP(o, NoiseModel(o, flip=0.0), horizon=10, confidence=1.0)
+    cost = dp.solve()
+    assert abs(cost - o.solve()) < 1e-9
+    assert abs(sum(1.0 - m for m in dp.expected_curve()["leaf_mass"]) - cost) < 1e-9
+
+def brute_entropy(o, C, p, h):
+    # Minimal expected posterior entropy after h questions, by exhaustive Bayes updates
+    if h == 0:
+        q = p[p > 0]
+        return float(-(q * np.log2(q)).sum())
+    best = None
+    for j, a in enumerate(o.attrs):
+        codes = np.array([o.attr_vals[a].index(o.objects[i][a]) for i in o.ids])
+        joint = p[:, None] * C[j][codes]
+        if (C[j][codes] == C[j][codes][0]).all():
+            continue
+        cost = sum(joint[:, y].sum() * brute_entropy(o, C, joint[:, y] / joint[:, y].sum(), h - 1)
+                   for y in range(joint.shape[1]) if joint[:, y].sum() > 1e-12)
+        best = cost if best is None else min(best, cost)
+    return best
+
+def test_noisy_entropy_matches_brute_force():
+    o = oracle("25_Animals.json")
+    noise = NoiseModel(o, flip=0.1)
+    dp = NoisyOracleDP(o, noise, horizon=2, confidence=1.0, objective="entropy", prune=0.0, quant=1 << 30)
+    expect = brute_entropy(o, noise.C, np.full(o.n, 1.0 / o.n), 2)
+    assert abs(dp.solve() - expect) < 1e-9
+    curve = dp.expected_curve()
+    assert abs(curve["E_entropy_bits"][-1] - expect) < 1e-9
+    assert abs(curve["leaf_mass"][-1] - 1.0) < 1e-12
+    assert all(0.0 <= p <= 1.0 for p in curve["E_top_posterior"])
+
+def test_boolean_noise_spec_uses_json_spelling():
+    o = oracle("25_Animals.json")
+    row = {"true": {"true": 0.9, "false": 0.1}, "false": {"false": 0.9, "true": 0.1}}
+    noise = NoiseModel(o, {"has_fur": row})
+    assert np.allclose(noise.C[o.attrs.index("has_fur")], symmetric_confusion(2, 0.1))
+
+def test_prune_never_empties_belief():
+    o = oracle("25_Animals.json")
+    dp = NoisyOracleDP(o, NoiseModel(o, flip=0.2), horizon=2, prune=2.0)
+    for _, ans in dp.expand(dp.root_belief()):
+        for _, _, (idx, p) in ans:
+            assert len(idx) >= 1 and abs(p.sum() - 1.0) < 1e-12
+    dp.solve()
+    assert dp.expected_curve()["leaf_mass"][-1] >= 1.0 - 1e-12
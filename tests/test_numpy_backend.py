@@ -0,0 +1,28 @@
+# The numpy engine reuses one backend per oracle and agrees with the recursive engine on state values.
+import json, os
+
+import oqa_kary_numpy
+from oqa_kary_oracle_dp import KaryOracleDP
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_evaluate_states_builds_backend_once(monkeypatch):
+    with open(os.path.join(ROOT, "k-ary-100", "oqa_kary100_dataset.json")) as f:
+        objects = json.load(f)
+    built = []
+    real = oqa_kary_numpy.KaryNumpyBackend
+
+    def counting(oracle):
+        built.append(oracle)
+        return real(oracle)
+
+    monkeypatch.setattr(oqa_kary_numpy, "KaryNumpyBackend", counting)
+    fast = KaryOracleDP(objects, engine="numpy")
+    fast.solve()
+    ids = sorted(objects)
+    states = [ids, ids[:1], ids[:2], ids[10:40]]
+    asked = [fast.attrs[0]] * len(states)
+    rows = fast.evaluate_states(states, asked)
+    assert len(built) == 1
+    ref = KaryOracleDP(objects).evaluate_states(states, asked)
+    assert [r["q_value"] for r in rows] == [r["q_value"] for r in ref]
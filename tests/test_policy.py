@@ -0,0 +1,32 @@
+# Compiled policy tables answer like the oracle and reject malformed requests.
+import io, json, os
+
+from oqa_kary_oracle_dp import KaryOracleDP
+from oqa_policy import PolicyTable, compile_policy, serve_stdio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def table(tmp_path):
+    with open(os.path.join(ROOT, "25_Animals.json")) as f:
+        oracle = KaryOracleDP(json.load(f))
+    path = str(tmp_path / "animals.oqapol")
+    compile_policy(oracle, path)
+    return oracle, PolicyTable(path)
+
+def test_root_matches_oracle(tmp_path):
+    oracle, t = table(tmp_path)
+    a, cost = t.lookup(oracle.root)
+    assert a == oracle.best_attr(oracle.root)
+    assert abs(cost - oracle.solve()) < 1e-12
+
+def test_bad_masks_get_error_replies(tmp_path):
+    oracle, t = table(tmp_path)
+    for mask in ("-1", "f" * 64, format(1 << oracle.n, "x")):
+        assert "error" in t.answer({"mask": mask})
+    lines = [json.dumps({"mask": "-5"}), json.dumps({"mask": "1" * 100}),
+             json.dumps({"ids": oracle.ids[:3]})]
+    out = io.StringIO()
+    serve_stdio(t, io.StringIO("\n".join(lines) + "\n"), out)
+    replies = [json.loads(r) for r in out.getvalue().splitlines()]
+    assert len(replies) == 3
+    assert "error" in replies[0] and "error" in replies[1]
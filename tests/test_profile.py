@@ -0,0 +1,25 @@
+# SolveProfiler reports: a profiled solve, and a profiler that never saw one.
+import json, os
+
+from oqa_kary_oracle_dp import KaryOracleDP
+from oqa_profile import SolveProfiler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def oracle():
+    with open(os.path.join(ROOT, "k-ary-100", "oqa_kary100_dataset.json")) as f:
+        return KaryOracleDP(json.load(f))
+
+def test_report_after_solve():
+    o = oracle()
+    with SolveProfiler(o, progress_every=None) as prof:
+        o.solve()
+    rep = prof.report()
+    assert rep["states_expanded"] == len(o.memo)
+    assert rep["seconds"] > 0
+
+def test_report_without_solve(tmp_path):
+    prof = SolveProfiler(oracle(), progress_every=None)
+    assert prof.report()["status"] == "no solve recorded"
+    out = prof.write(str(tmp_path / "p.json"), dataset="k-ary-100")
+    assert out["status"] == "no solve recorded" and out["dataset"] == "k-ary-100"
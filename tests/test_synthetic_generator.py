@@ -0,0 +1,24 @@
+# Generator ranges wider than sys.maxsize (d=64 boolean, d=40 ternary).
+import random, sys
+
+import pytest
+
+from synthetic_generator import iter_objects, rank_to_digits, sample_ranks
+
+@pytest.mark.parametrize("d,k", [(64, 2), (40, 3)])
+def test_wide_rank_range(d, k):
+    assert k ** d > sys.maxsize
+    ranks = sample_ranks(200, d, k, random.Random(0))
+    assert len(set(ranks)) == 200 and ranks == sorted(ranks)
+    assert all(0 <= r < k ** d for r in ranks)
+
+def test_d64_dataset():
+    objects = dict(iter_objects(100, 64, 2, seed=1))
+    assert len(objects) == 100
+    assert all(len(o) == 64 for o in objects.values())
+    assert len({tuple(o.values()) for o in objects.values()}) == 100
+
+def test_small_range_keeps_seeded_output():
+    # rng.sample is still used below sys.maxsize, so existing seeds reproduce
+    assert sample_ranks(5, 11, 2, random.Random(3)) == sorted(random.Random(3).sample(range(2 ** 11), 5))
+    assert rank_to_digits(5, 4, 2) == [0, 1, 0, 1]
@@ -0,0 +1,39 @@
+# Batch trajectories: question counts under saved trees and prior-weighted entropy bands.
+import json, os
+
+import numpy as np
+import pytest
+
+from oqa_kary_oracle_dp import KaryOracleDP
+from oqa_trajectories import bands, depths, entropy_bits, optimal_policy, trajectories, tree_policy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OBJECTS = {"x": {"a": "1", "b": "1"}, "y": {"a": "1", "b": "2"}, "z": {"a": "2", "b": "2"}}
+
+def test_question_that_does_not_shrink_is_counted():
+    oracle = KaryOracleDP(OBJECTS)
+    # "b" first, then "a" for b=2; "a" is asked again under b=1 though only x is left
+    leaf = lambda *ids: {"type": "leaf", "ids": list(ids)}
+    tree = {"type": "question", "attribute": "b", "children": {
+        "1": {"type": "question", "attribute": "a", "children": {"1": leaf("x")}},
+        "2": {"type": "question", "attribute": "a", "children": {"1": leaf("y"), "2": leaf("z")}}}}
+    policy = tree_policy(tree, oracle)
+    R, N = trajectories(oracle, policy)
+    assert depths(N, policy).tolist() == [2, 2, 2]
+    assert bands(R, N, policy)["finished"].tolist() == [0.0, 0.0, 1.0]
+
+def test_weighted_entropy_is_prior_entropy():
+    with open(os.path.join(ROOT, "k-ary-100", "oqa_kary100_dataset.json")) as f:
+        objects = json.load(f)
+    weights = {oid: 1.0 + k % 7 for k, oid in enumerate(sorted(objects))}
+    oracle = KaryOracleDP(objects, weights=weights)
+    policy = optimal_policy(oracle)
+    R, N = trajectories(oracle, policy)
+    H = entropy_bits(N, oracle.weights)
+    # Each object's candidates after t questions are exactly the objects at its node
+    for i in range(0, oracle.n, 9):
+        for t in range(N.shape[1]):
+            S = sum(1 << j for j in np.flatnonzero(N[:, t] == N[i, t]).tolist())
+            assert H[i, t] == pytest.approx(oracle.entropy(S), abs=1e-9)
+    assert entropy_bits(N)[:, 0] == pytest.approx(np.log2(R[:, 0]))
+    assert (depths(N, policy) @ np.array(oracle.weights)) == pytest.approx(oracle.solve())
@@ -0,0 +1,41 @@
+# Every node of the optimal tree must split its candidates by the attribute it is labelled with.
+import itertools, json, os
+
+import pytest
+
+from oqa_kary_oracle_dp import ENGINES, KaryOracleDP
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def leaf_ids(node):
+    out, stack = [], [node]
+    while stack:
+        n = stack.pop()
+        if n["type"] == "leaf":
+            out.extend(n["ids"])
+        else:
+            stack.extend(c["subtree"] for c in n["children"])
+    return out
+
+def mislabelled(objects, tree):
+    bad, stack = [], [tree]
+    while stack:
+        node = stack.pop()
+        if node["type"] == "leaf":
+            continue
+        a = node["attribute"]
+        for child in node["children"]:
+            if {objects[i][a] for i in leaf_ids(child["subtree"])} != {child["value"]}:
+                bad.append((a, child["value"]))
+            stack.append(child["subtree"])
+    return bad
+
+@pytest.mark.parametrize("dataset,canonical,engine",
+                         [(d, c, e) for d in ("25_Cars.json", "25_Animals.json", "100_Animals.json")
+                          for c, e in itertools.product((False, True), ENGINES)])
+def test_children_match_label(dataset, canonical, engine):
+    with open(os.path.join(ROOT, dataset)) as f:
+        objects = json.load(f)
+    oracle = KaryOracleDP(objects, canonical=canonical, engine=engine)
+    oracle.solve()
+    assert mislabelled(objects, oracle.build_optimal_tree()) == []
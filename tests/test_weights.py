@@ -0,0 +1,40 @@
+# Prior weights sidecars: CSV parsing, and equal weights behaving exactly like no weights.
+import json, os
+
+import pytest
+
+from oqa_kary_oracle_dp import ENGINES, KaryOracleDP, load_weights
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_csv_blank_lines_and_header(tmp_path):
+    path = tmp_path / "w.csv"
+    path.write_text("id,weight\n\na,1.5\n\nb,2\n,\n")
+    assert load_weights(str(path)) == {"a": 1.5, "b": 2.0}
+
+def test_csv_bad_row_after_first(tmp_path):
+    path = tmp_path / "w.csv"
+    path.write_text("a,1\nb,heavy\n")
+    with pytest.raises(ValueError):
+        load_weights(str(path))
+    path.write_text("\nid,weight\nc,oops\n")
+    with pytest.raises(ValueError):
+        load_weights(str(path))
+
+@pytest.mark.parametrize("dataset", ["25_Animals.json", os.path.join("k-ary-100", "oqa_kary100_dataset.json")])
+@pytest.mark.parametrize("engine", ENGINES)
+def test_uniform_weights_are_bit_identical(dataset, engine):
+    with open(os.path.join(ROOT, dataset)) as f:
+        objects = json.load(f)
+    plain = KaryOracleDP(objects, engine=engine)
+    weighted = KaryOracleDP(objects, engine=engine, weights={oid: 3.0 for oid in objects})
+    assert weighted.solve() == plain.solve()
+    assert json.dumps(weighted.build_optimal_tree()) == json.dumps(plain.build_optimal_tree())
+    assert weighted.expected_curve() == plain.expected_curve()
+
+def test_skewed_weights_change_the_policy():
+    with open(os.path.join(ROOT, "25_Animals.json")) as f:
+        objects = json.load(f)
+    ids = sorted(objects)
+    skewed = KaryOracleDP(objects, weights={oid: 100.0 if oid == ids[0] else 1.0 for oid in ids})
+    assert skewed.solve() < KaryOracleDP(objects).solve()